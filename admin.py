@@ -0,0 +1,134 @@
+"""Paginated, server-side filtered browsing of whole tables for the admin.
+
+Filtering, sorting and paging are all pushed into SQL, so an admin session
+only ever holds the one page it is looking at, whatever the table size.
+Pages are fetched with a keyset cursor on (sort column, id). Only columns
+listed in ADMIN_TABLES can be filtered or sorted on, which keeps user input
+out of the SQL text and every sort backed by an index.
+"""
+import pandas as pd
+import streamlit as st
+
+from db import get_pool
+
+ADMIN_PAGE_SIZE = 50
+COUNT_TTL = 30  # seconds a cached total may be shown before it is recounted
+
+ADMIN_TABLES = {
+    'users': {
+        'from': "users u",
+        'columns': {
+            'id': "u.id",
+            'username': "u.username",
+            'role': "u.role",
+        },
+        'filters': {'username': 'prefix', 'role': 'equals'},
+        'sorts': ['id', 'username'],
+    },
+    'jobs': {
+        'from': "jobs j JOIN users u ON j.recruiter_id = u.id",
+        'columns': {
+            'id': "j.id",
+            'recruiter': "u.username",
+            'title': "j.title",
+            'company': "j.company",
+            'created_at': "j.created_at",
+            'description': "SUBSTR(j.description, 1, 200)",
+        },
+        'filters': {'recruiter': 'prefix', 'company': 'prefix', 'title': 'prefix'},
+        'sorts': ['id', 'created_at'],
+    },
+    'applications': {
+        'from': "applications a JOIN users u ON a.applicant_id = u.id JOIN jobs j ON a.job_id = j.id",
+        'columns': {
+            'id': "a.id",
+            'applicant': "u.username",
+            'job_title': "j.title",
+            'status': "a.status",
+            'applied_at': "a.applied_at",
+        },
+        'filters': {'applicant': 'prefix', 'job_title': 'prefix', 'status': 'equals'},
+        'sorts': ['id', 'applied_at'],
+    },
+}
+
+
+def _where(spec, filters):
+    """Builds the WHERE clause and parameters for the non-empty ``filters``."""
+    clauses, params = [], []
+    for column, value in (filters or {}).items():
+        if value in (None, ""):
+            continue
+        mode = spec['filters'][column]
+        expression = spec['columns'][column]
+        if mode == 'prefix':
+            # '!' rather than backslash: the escape character is spelled the same in every dialect.
+            escaped = value.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+            clauses.append(f"{expression} LIKE %s ESCAPE '!'")
+            params.append(escaped + "%")
+        else:
+            clauses.append(f"{expression} = %s")
+            params.append(value)
+    return clauses, params
+
+
+def browse(conn, table, filters=None, sort='id', descending=False, after=None, limit=ADMIN_PAGE_SIZE):
+    """Returns one page of ``table`` as a DataFrame, plus the next page's cursor.
+
+    ``after`` is the (sort value, id) of the last row on the previous page;
+    the next cursor is None on the last page.
+    """
+    spec = ADMIN_TABLES[table]
+    if sort not in spec['sorts']:
+        raise ValueError(f"Cannot sort {table} by {sort!r}.")
+    sort_expression = spec['columns'][sort]
+    id_expression = spec['columns']['id']
+    direction = "DESC" if descending else "ASC"
+
+    clauses, params = _where(spec, filters)
+    if after is not None:
+        comparison = "<" if descending else ">"
+        if sort == 'id':
+            clauses.append(f"{id_expression} {comparison} %s")
+            params.append(after[1])
+        else:
+            # Not a row comparison: MySQL only range-scans the expanded form.
+            clauses.append(f"({sort_expression} {comparison} %s OR ({sort_expression} = %s AND {id_expression} {comparison} %s))")
+            params.extend((after[0], after[0], after[1]))
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    select = ", ".join(f"{expression} AS {name}" for name, expression in spec['columns'].items())
+    order = f"{id_expression} {direction}" if sort == 'id' else f"{sort_expression} {direction}, {id_expression} {direction}"
+
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT {select} FROM {spec['from']} {where} ORDER BY {order} LIMIT %s",
+                   (*params, limit + 1))
+    rows = cursor.fetchall()
+    cursor.close()
+
+    names = list(spec['columns'])
+    next_after = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_after = (last[names.index(sort)], last[names.index('id')])
+    return pd.DataFrame(rows[:limit], columns=names), next_after
+
+
+def count_rows(conn, table, filters=None):
+    """Counts the rows of ``table`` matching ``filters``."""
+    spec = ADMIN_TABLES[table]
+    clauses, params = _where(spec, filters)
+    # Unfiltered totals skip the joins, which every row satisfies anyway.
+    source = spec['from'] if clauses else spec['from'].split(" JOIN ")[0]
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT COUNT(*) FROM {source} {where}", tuple(params))
+    total = cursor.fetchone()[0]
+    cursor.close()
+    return total
+
+
+@st.cache_data(ttl=COUNT_TTL, show_spinner=False)
+def load_count(table, filter_items=()):
+    """Cached count_rows(); ``filter_items`` is a hashable tuple of (column, value)."""
+    with get_pool().connection() as conn:
+        return count_rows(conn, table, dict(filter_items))
@@ -0,0 +1,331 @@
+"""Hiring-funnel analytics kept in summary tables.
+
+Three small tables hold everything the funnel and trend charts read:
+analytics_job_status (applicants per job and current status),
+analytics_job_daily (applications per job and day applied) and
+analytics_stage_durations (per job, a histogram of how long applications
+took from applying to first reaching Interview or Hired, kept after they move
+on; see STAGE_COLUMNS). They are adjusted in the
+same transaction as every apply, withdrawal, status change and job deletion,
+so the charts cost O(jobs) to draw however many applications there are.
+
+reconcile() rebuilds the tables from the raw rows and reports how many
+summary rows had drifted; a write racing a rebuild can leave a drift that
+the next one corrects. The app runs it every ANALYTICS_RECONCILE_SECONDS,
+and ``python analytics.py`` runs it once, e.g. from cron.
+"""
+import argparse
+import logging
+import threading
+import time
+from bisect import bisect_right
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+import streamlit as st
+
+from db import dialect, get_pool
+
+logger = logging.getLogger(__name__)
+
+# When an application first reached each stage.
+STAGE_COLUMNS = {'Interview': 'interview_at', 'Hired': 'hired_at'}
+FUNNEL_STATUSES = ['Pending', 'In Review', 'Interview', 'Hired']  # Rejected is reported beside the funnel
+DURATION_BUCKET_DAYS = (1, 3, 7, 14, 30, 60)  # upper bounds; the last bucket is open-ended
+DURATION_BUCKET_LABELS = ['< 1 day', '1-3 days', '3-7 days', '1-2 weeks', '2-4 weeks', '1-2 months', '2+ months']
+TREND_DAYS = 90
+ANALYTICS_TTL = 60  # seconds the dashboards may show stale charts
+DEFAULT_RECONCILE_SECONDS = 3600.0
+
+# table: (key columns, counter columns)
+SUMMARY_TABLES = {
+    'analytics_job_status': (('job_id', 'status'), ('applicants',)),
+    'analytics_job_daily': (('job_id', 'day'), ('applications',)),
+    'analytics_stage_durations': (('job_id', 'stage', 'bucket'), ('applications', 'total_seconds')),
+}
+
+
+def duration_bucket(seconds):
+    """The index into DURATION_BUCKET_LABELS of a duration."""
+    return bisect_right(DURATION_BUCKET_DAYS, seconds / 86400)
+
+
+def database_now(cursor):
+    """The database's clock, which also stamps applied_at."""
+    cursor.execute("SELECT CURRENT_TIMESTAMP")
+    now = cursor.fetchone()[0]
+    # SQLite returns the expression as text.
+    return datetime.fromisoformat(now) if isinstance(now, str) else now
+
+
+def _stage_rows(cursor, where, params):
+    """(job_id, stage, applied_at, entered_at) for each stage the matching applications reached."""
+    rows = []
+    for stage, column in STAGE_COLUMNS.items():
+        cursor.execute(f"SELECT job_id, applied_at, {column} FROM applications WHERE ({where}) AND {column} IS NOT NULL",
+                       tuple(params))
+        rows.extend((job_id, stage, applied_at, entered_at) for job_id, applied_at, entered_at in cursor.fetchall())
+    return rows
+
+
+def _duration_rows(samples):
+    """Duration summary rows, keyed (job_id, stage, bucket), of _stage_rows() samples."""
+    durations = {}
+    for job_id, stage, applied_at, entered_at in samples:
+        seconds = max(0, int((entered_at - applied_at).total_seconds()))
+        key = (job_id, stage, duration_bucket(seconds))
+        applications, total_seconds = durations.get(key, (0, 0))
+        durations[key] = (applications + 1, total_seconds + seconds)
+    return durations
+
+
+def _summarize(cursor, where="1 = 1", params=()):
+    """Every summary table's rows for the applications matching ``where``.
+
+    Returned as {table: {key: values}}.
+    """
+    cursor.execute(f"""
+        SELECT job_id, status, DATE(applied_at), COUNT(*) FROM applications
+        WHERE {where}
+        GROUP BY job_id, status, DATE(applied_at)
+    """, tuple(params))
+    by_status, by_day = Counter(), Counter()
+    for job_id, status, day, count in cursor.fetchall():
+        by_status[job_id, status] += count
+        by_day[job_id, str(day)] += count
+    return {
+        'analytics_job_status': {key: (count,) for key, count in by_status.items()},
+        'analytics_job_daily': {key: (count,) for key, count in by_day.items()},
+        'analytics_stage_durations': _duration_rows(_stage_rows(cursor, where, params)),
+    }
+
+
+def _bump(cursor, table, rows):
+    """Adds each row's counters to the summary row with the same key, creating it if needed."""
+    if not rows:
+        return
+    keys, counters = SUMMARY_TABLES[table]
+    if dialect(cursor) == 'sqlite':
+        on_conflict = (f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET "
+                       + ", ".join(f"{column} = {column} + excluded.{column}" for column in counters))
+    else:
+        on_conflict = "ON DUPLICATE KEY UPDATE " + ", ".join(f"{column} = {column} + VALUES({column})" for column in counters)
+    cursor.executemany(f"""
+        INSERT INTO {table} ({', '.join(keys + counters)}) VALUES ({', '.join(['%s'] * (len(keys) + len(counters)))})
+        {on_conflict}
+    """, rows)
+
+
+def _add(cursor, summaries, sign):
+    for table, rows in summaries.items():
+        _bump(cursor, table, [(*key, *(sign * value for value in values)) for key, values in rows.items()])
+
+
+# --- Write hooks; each runs in the caller's transaction and the caller commits ---
+
+def record_applied(cursor, where, params):
+    """Counts the just-inserted applications matching ``where``."""
+    _add(cursor, _summarize(cursor, where, params), 1)
+
+
+def record_removed(cursor, where, params):
+    """Uncounts the applications matching ``where``; call it before deleting them."""
+    _add(cursor, _summarize(cursor, where, params), -1)
+
+
+def record_status_change(cursor, where, params, status, changed_at):
+    """Moves the applications matching ``where`` to ``status`` in the summaries.
+
+    Call it before the UPDATE that sets the status. Applications reaching a
+    stage for the first time are stamped with ``changed_at`` and add their
+    time since applying to its histogram; moving on, or coming back, later
+    leaves that sample alone.
+    """
+    cursor.execute(f"SELECT job_id, status, COUNT(*) FROM applications WHERE {where} GROUP BY job_id, status",
+                   tuple(params))
+    moves = Counter()
+    for job_id, old_status, count in cursor.fetchall():
+        moves[job_id, old_status] -= count
+        moves[job_id, status] += count
+    _bump(cursor, 'analytics_job_status', [(*key, count) for key, count in moves.items() if count])
+
+    column = STAGE_COLUMNS.get(status)
+    if column:
+        cursor.execute(f"SELECT job_id, applied_at FROM applications WHERE ({where}) AND {column} IS NULL",
+                       tuple(params))
+        samples = [(job_id, status, applied_at, changed_at) for job_id, applied_at in cursor.fetchall()]
+        _bump(cursor, 'analytics_stage_durations', [(*key, *values) for key, values in _duration_rows(samples).items()])
+        cursor.execute(f"UPDATE applications SET {column} = %s WHERE ({where}) AND {column} IS NULL",
+                       (changed_at, *params))
+
+
+def forget_jobs(cursor, job_ids):
+    """Drops the summaries of jobs that are being deleted along with their applications."""
+    placeholders = ", ".join(["%s"] * len(job_ids))
+    for table in SUMMARY_TABLES:
+        cursor.execute(f"DELETE FROM {table} WHERE job_id IN ({placeholders})", tuple(job_ids))
+
+
+# --- Reconciliation ---
+
+def _stored(cursor, table):
+    keys, counters = SUMMARY_TABLES[table]
+    cursor.execute(f"SELECT {', '.join(keys + counters)} FROM {table}")
+    rows = {}
+    for row in cursor.fetchall():
+        key, values = row[:len(keys)], tuple(int(value) for value in row[len(keys):])
+        if table == 'analytics_job_daily':
+            key = (key[0], str(key[1]))
+        if any(values):
+            rows[key] = values
+    return rows
+
+
+def rebuild(cursor):
+    """Recomputes every summary table from the raw rows. The caller commits.
+
+    Returns {table: number of summary rows that were missing, extra or wrong}.
+    """
+    expected = _summarize(cursor)
+    drift = {}
+    for table, rows in expected.items():
+        stored = _stored(cursor, table)
+        drift[table] = sum(1 for key in stored.keys() | rows.keys() if stored.get(key) != rows.get(key))
+        if not drift[table]:
+            continue
+        cursor.execute(f"DELETE FROM {table}")
+        _bump(cursor, table, [(*key, *values) for key, values in rows.items()])
+    return drift
+
+
+def reconcile(conn):
+    """rebuild() in its own transaction. Returns a report of when it ran and what it fixed."""
+    started = time.perf_counter()
+    cursor = conn.cursor()
+    try:
+        drift = rebuild(cursor)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return {'finished_at': datetime.now(), 'seconds': time.perf_counter() - started, 'drift': drift}
+
+
+class Reconciler:
+    """Runs reconcile() on a background thread every ``interval`` seconds."""
+
+    def __init__(self, interval=DEFAULT_RECONCILE_SECONDS):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._last_report = None
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name='analytics-reconcile', daemon=True)
+        self._thread.start()
+
+    def run_now(self):
+        """Reconciles immediately and returns the report."""
+        with get_pool().connection() as conn:
+            report = reconcile(conn)
+        total = sum(report['drift'].values())
+        if total:
+            logger.warning("Analytics reconciliation corrected %d summary rows: %s", total, report['drift'])
+        with self._lock:
+            self._last_report = report
+        return report
+
+    def last_report(self):
+        with self._lock:
+            return self._last_report
+
+    def stop(self):
+        self._stopped.set()
+
+    def _loop(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.run_now()
+            except Exception:
+                logger.exception("Analytics reconciliation failed")
+
+
+@st.cache_resource
+def get_reconciler():
+    """Returns the process-wide reconciler, starting it on first use."""
+    return Reconciler(float(st.secrets.get("ANALYTICS_RECONCILE_SECONDS", DEFAULT_RECONCILE_SECONDS)))
+
+
+# --- Readers ---
+
+def _recruiter_filter(recruiter_id):
+    if recruiter_id is None:
+        return "", ()
+    return "JOIN jobs j ON j.id = s.job_id WHERE j.recruiter_id = %s", (recruiter_id,)
+
+
+def funnel(conn, recruiter_id=None):
+    """Applicants per current status over all jobs, or one recruiter's, as {status: count}."""
+    join, params = _recruiter_filter(recruiter_id)
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT s.status, SUM(s.applicants) FROM analytics_job_status s {join} GROUP BY s.status",
+                   params)
+    counts = {status: int(total) for status, total in cursor.fetchall() if total}
+    cursor.close()
+    return counts
+
+
+def stage_durations(conn, recruiter_id=None):
+    """A DataFrame of stage, duration bucket, applications and their mean days to get there."""
+    join, params = _recruiter_filter(recruiter_id)
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT s.stage, s.bucket, SUM(s.applications), SUM(s.total_seconds) FROM analytics_stage_durations s {join}
+        GROUP BY s.stage, s.bucket
+    """, params)
+    rows = [(stage, DURATION_BUCKET_LABELS[bucket], int(applications), total_seconds / applications / 86400)
+            for stage, bucket, applications, total_seconds in sorted(cursor.fetchall(), key=lambda row: row[1])
+            if applications]
+    cursor.close()
+    return pd.DataFrame(rows, columns=['stage', 'time_to_stage', 'applications', 'mean_days'])
+
+
+def daily_trend(conn, recruiter_id=None, days=TREND_DAYS):
+    """A DataFrame of applications per day and company over the last ``days`` days."""
+    where, params = "WHERE d.day >= %s", [(date.today() - timedelta(days=days)).isoformat()]
+    if recruiter_id is not None:
+        where += " AND j.recruiter_id = %s"
+        params.append(recruiter_id)
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT d.day, j.company, SUM(d.applications) FROM analytics_job_daily d
+        JOIN jobs j ON j.id = d.job_id
+        {where}
+        GROUP BY d.day, j.company
+        ORDER BY d.day
+    """, tuple(params))
+    trend = pd.DataFrame(cursor.fetchall(), columns=['day', 'company', 'applications'])
+    cursor.close()
+    trend['day'] = pd.to_datetime(trend['day'])
+    trend['applications'] = trend['applications'].astype(int)
+    return trend[trend['applications'] > 0]
+
+
+@st.cache_data(ttl=ANALYTICS_TTL, show_spinner=False)
+def load_analytics(recruiter_id=None):
+    """Cached funnel(), stage_durations() and daily_trend() for one recruiter, or everyone."""
+    with get_pool().connection() as conn:
+        return {
+            'funnel': funnel(conn, recruiter_id),
+            'stage_durations': stage_durations(conn, recruiter_id),
+            'daily_trend': daily_trend(conn, recruiter_id),
+        }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Rebuild the analytics summary tables from the raw rows.")
+    parser.parse_args()
+    with get_pool().connection() as conn:
+        report = reconcile(conn)
+    print(f"Reconciled in {report['seconds']:.2f}s; rows corrected: {report['drift']}")
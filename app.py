@@ -1,12 +1,36 @@
 import streamlit as st
 import mysql.connector
 import pandas as pd
-import hashlib
-import PyPDF2
+import io
+import time
 import plotly.express as px
 from datetime import datetime
 
+from admin import ADMIN_PAGE_SIZE, ADMIN_TABLES, browse, load_count
+from analytics import FUNNEL_STATUSES, TREND_DAYS, get_reconciler, load_analytics
+from applications import (APPLICANT_PAGE_SIZE, APPLICATION_STATUSES, applicant_breakdown,
+                          count_applicants, fail_resume_parse, find_application, get_application,
+                          list_applicants_page, submit_application, update_status_by_filter, update_statuses,
+                          withdraw_application)
+from bootstrap import ensure_bootstrapped
+from bulk_import import DEFAULT_BATCH_SIZE, IMPORT_FIELDS, run_import
+from db import db_connection, get_pool
+from events import applicant_snapshot, events_since, mark_events_seen
+from export import EXPORT_FORMATS, export_to_tempfile
+from instrumentation import get_profiler
+from jobs import delete_jobs, get_job, invalidate_job_board, list_recruiter_jobs, load_job, load_job_page, post_job
+from migrations import MigrationError
+from resume_parser import MAX_RESUME_BYTES, ParserBusy, decode_text, get_resume_parser
+from resume_store import load_original, load_resume_text, retry_resume, store_resume
+from search import search_applicants
+from users import authenticate, create_user
+
 # --- Section 1: Database Connection and Setup ---
+
+# Times every query and render section of this rerun; see instrumentation.py.
+profiler = get_profiler()
+profiler.rerun_started()
+
 st.set_page_config(
     page_title="Online Recruitment System",
     page_icon="👨‍💼",
@@ -25,114 +49,39 @@ DB_CONFIG = {
     'database': 'recruitment_db'
 }
 
-def get_db_connection():
-    """Establishes and returns a connection to the MySQL database."""
-    try:
-        # Use st.secrets to securely access credentials
-        return mysql.connector.connect(
-            host=st.secrets["DB_HOST"],
-            user=st.secrets["DB_USER"],
-            password=st.secrets["DB_PASSWORD"],
-            database=st.secrets["DB_DATABASE"]
-        )
-    except mysql.connector.Error as err:
-        st.error(f"Error connecting to MySQL database: {err}")
-        return None
-
-def create_tables():
-    """Creates the necessary tables if they do not exist."""
-    conn = get_db_connection()
-    if conn:
-        cursor = conn.cursor()
-        
-        # User table with roles
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                username VARCHAR(255) UNIQUE NOT NULL,
-                password_hash VARCHAR(255) NOT NULL,
-                role ENUM('applicant', 'recruiter', 'admin') NOT NULL
-            )
-        """)
-        
-        # Jobs table with new fields
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS jobs (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                recruiter_id INT NOT NULL,
-                company VARCHAR(255) NOT NULL,
-                job_role VARCHAR(255) NOT NULL,
-                job_description TEXT NOT NULL,
-                skills_required TEXT,
-                salary VARCHAR(255),
-                title VARCHAR(255) NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (recruiter_id) REFERENCES users(id)
-            )
-        """)
-
-        # Applications table with new applicant details
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS applications (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                job_id INT NOT NULL,
-                applicant_id INT NOT NULL,
-                name VARCHAR(255),
-                email VARCHAR(255),
-                phone VARCHAR(20),
-                gender VARCHAR(50),
-                nationality VARCHAR(100),
-                resume_text TEXT,
-                status ENUM('Pending', 'In Review', 'Interview', 'Rejected', 'Hired') DEFAULT 'Pending',
-                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (job_id) REFERENCES jobs(id),
-                FOREIGN KEY (applicant_id) REFERENCES users(id)
-            )
-        """)
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
-
-# Create tables on startup
-create_tables()
+# Pool creation, schema migrations and cache warm-up run once per process,
+# not on every rerun; see bootstrap.py.
+try:
+    bootstrap_report = ensure_bootstrapped()
+except (mysql.connector.Error, MigrationError) as err:
+    st.error(f"Error preparing the database: {err}")
+    st.stop()
 
 # --- Section 2: User Authentication and Management ---
 
-def hash_password(password):
-    """Hashes a password using SHA-256."""
-    return hashlib.sha256(password.encode()).hexdigest()
-
 def authenticate_user(username, password, role):
-    """Authenticates a user and returns their ID and role."""
-    conn = get_db_connection()
-    if conn:
-        cursor = conn.cursor(dictionary=True)
-        password_hash = hash_password(password)
-        cursor.execute("SELECT id, role FROM users WHERE username = %s AND password_hash = %s AND role = %s",
-                       (username, password_hash, role))
-        user = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        return user
+    """Authenticates a user and returns their ID and role.
+
+    A recruiter's login also records what they have seen so far; the event ID
+    they had seen before is returned as 'seen_after'.
+    """
+    with db_connection() as conn:
+        if conn:
+            user = authenticate(conn, username, password, role)
+            if user and user['role'] == 'recruiter':
+                user['seen_after'] = mark_events_seen(conn, user['id'])
+            return user
     return None
 
 def add_user(username, password, role):
     """Adds a new user to the database."""
-    conn = get_db_connection()
-    if conn:
-        cursor = conn.cursor()
-        password_hash = hash_password(password)
-        try:
-            cursor.execute("INSERT INTO users (username, password_hash, role) VALUES (%s, %s, %s)",
-                           (username, password_hash, role))
-            conn.commit()
-            st.success(f"User '{username}' registered successfully as a {role}!")
-        except mysql.connector.Error as err:
-            st.error(f"Error registering user: {err}")
-        finally:
-            cursor.close()
-            conn.close()
+    with db_connection() as conn:
+        if conn:
+            try:
+                create_user(conn, username, password, role)
+                st.success(f"User '{username}' registered successfully as a {role}!")
+            except mysql.connector.Error as err:
+                st.error(f"Error registering user: {err}")
 
 # Use Streamlit's session state to manage user login status
 if 'logged_in' not in st.session_state:
@@ -160,6 +109,8 @@ def login_form():
                     st.session_state.logged_in = True
                     st.session_state.user_id = user['id']
                     st.session_state.user_role = user['role']
+                    if 'seen_after' in user:
+                        st.session_state.applicants_seen_after = user['seen_after']
                     st.rerun()
                 else:
                     st.error("Invalid username, password, or role.")
@@ -183,48 +134,111 @@ def logout_button():
 
 # --- Section 3: Applicant Dashboard ---
 
+STATUS_POLL_SECONDS = 15  # how often an open job board checks for status changes
+
+def sync_job_statuses(conn):
+    """Brings the applicant's cached {job_id: status} map up to date. Returns True if it changed.
+
+    The first call loads every status; later ones apply only the events since,
+    some of which may already be reflected in the map.
+    """
+    st.session_state.statuses_synced_at = time.monotonic()
+    if 'job_statuses' not in st.session_state:
+        st.session_state.job_statuses, st.session_state.status_cursor = applicant_snapshot(conn, st.session_state.user_id)
+        return False
+    events, st.session_state.status_cursor = events_since(conn, st.session_state.status_cursor,
+                                                          applicant_id=st.session_state.user_id)
+    statuses = st.session_state.job_statuses
+    before = dict(statuses)
+    for event in events:
+        if event['event_type'] == 'withdrawn':
+            statuses.pop(event['job_id'], None)
+        else:
+            statuses[event['job_id']] = event['status']
+    return statuses != before
+
+@st.fragment(run_every=STATUS_POLL_SECONDS)
+def watch_job_statuses():
+    """Polls for status changes while the board is open and redraws it only when one arrives."""
+    if time.monotonic() - st.session_state.get('statuses_synced_at', 0) < STATUS_POLL_SECONDS / 2:
+        return  # the run that drew the board has just synced
+    with db_connection() as conn:
+        changed = bool(conn) and sync_job_statuses(conn)
+    if changed:
+        st.rerun(scope="app")
+
 def show_applicant_dashboard():
     """Renders the dashboard for applicants."""
     st.subheader(f"Welcome, {st.session_state.user_role.capitalize()}! 👋")
     st.markdown("---")
-    
-    conn = get_db_connection()
-    if conn:
-        jobs_df = pd.read_sql("SELECT * FROM jobs", conn)
-        applied_jobs_df = pd.read_sql(f"SELECT job_id, status FROM applications WHERE applicant_id = {st.session_state.user_id}", conn)
-        conn.close()
-
-        if 'view_job_details' not in st.session_state:
-            st.session_state.view_job_details = None
-        
-        if st.session_state.view_job_details is None:
-            st.markdown("### Available Jobs")
-            if not jobs_df.empty:
-                cols = st.columns(3, gap="small")
-                for i, row in jobs_df.iterrows():
-                    with cols[i % 3]:
-                        job_applied = row['id'] in applied_jobs_df['job_id'].values
-                        with st.container(border=True):
-                            st.subheader(row['company'])
-                            st.write(f"**{row['job_role']}**")
-                            if job_applied:
-                                current_status = applied_jobs_df.loc[applied_jobs_df['job_id'] == row['id'], 'status'].iloc[0]
-                                st.markdown(f"<p style='color:green; font-weight:bold;'>{current_status}</p>", unsafe_allow_html=True)
-                            else:
-                                st.markdown(f"<p style='color:black; font-weight:bold;'>Not Applied</p>", unsafe_allow_html=True)
 
-                            if st.button("View Details & Apply", key=f"view_{row['id']}"):
-                                st.session_state.view_job_details = row['id']
-                                st.rerun()
-            else:
-                st.info("No jobs are currently available.")
-        else:
-            show_job_details(jobs_df)
+    if 'view_job_details' not in st.session_state:
+        st.session_state.view_job_details = None
+    if 'job_page_cursors' not in st.session_state:
+        # Stack of keyset cursors; the last entry is the page being shown.
+        st.session_state.job_page_cursors = [None]
 
-def show_job_details(jobs_df):
+    if st.session_state.view_job_details is not None:
+        show_job_details(st.session_state.view_job_details)
+        return
+
+    try:
+        jobs, next_after = load_job_page(st.session_state.job_page_cursors[-1])
+    except mysql.connector.Error as err:
+        st.error(f"Error loading jobs: {err}")
+        return
+
+    with db_connection() as conn:
+        if not conn:
+            return
+        sync_job_statuses(conn)
+    statuses = st.session_state.job_statuses
+
+    st.markdown("### Available Jobs")
+    if jobs:
+        cols = st.columns(3, gap="small")
+        for i, (job_id, company, job_role, _created_at) in enumerate(jobs):
+            with cols[i % 3]:
+                current_status = statuses.get(job_id)
+                with st.container(border=True):
+                    st.subheader(company)
+                    st.write(f"**{job_role}**")
+                    if current_status:
+                        st.markdown(f"<p style='color:green; font-weight:bold;'>{current_status}</p>", unsafe_allow_html=True)
+                    else:
+                        st.markdown(f"<p style='color:black; font-weight:bold;'>Not Applied</p>", unsafe_allow_html=True)
+
+                    if st.button("View Details & Apply", key=f"view_{job_id}"):
+                        st.session_state.view_job_details = job_id
+                        st.rerun()
+
+        col_prev, col_next = st.columns(2)
+        with col_prev:
+            if len(st.session_state.job_page_cursors) > 1 and st.button("← Newer Jobs"):
+                st.session_state.job_page_cursors.pop()
+                st.rerun()
+        with col_next:
+            if next_after is not None and st.button("Older Jobs →"):
+                st.session_state.job_page_cursors.append(next_after)
+                st.rerun()
+        watch_job_statuses()
+    else:
+        st.info("No jobs are currently available.")
+
+def show_job_details(job_id):
     """Displays a single job's details and the application form."""
     st.markdown("### Job Details")
-    selected_job = jobs_df[jobs_df['id'] == st.session_state.view_job_details].iloc[0]
+    try:
+        selected_job = load_job(job_id)
+    except mysql.connector.Error as err:
+        st.error(f"Error loading job: {err}")
+        return
+    if selected_job is None:
+        st.info("This job is no longer available.")
+        st.session_state.view_job_details = None
+        if st.button("Back to Jobs"):
+            st.rerun()
+        return
     
     with st.container(border=True):
         st.subheader(selected_job['job_role'])
@@ -237,28 +251,20 @@ def show_job_details(jobs_df):
         st.markdown("### Skills Required")
         st.write(selected_job['skills_required'])
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM applications WHERE job_id = %s AND applicant_id = %s",
-                   (int(selected_job['id']), st.session_state.user_id))
-    has_applied = cursor.fetchone()
-    cursor.close()
-    conn.close()
+    with db_connection() as conn:
+        if not conn:
+            return
+        has_applied = find_application(conn, int(selected_job['id']), st.session_state.user_id)
 
     if has_applied:
         st.success("You have already applied for this job.")
         if st.button("Withdraw Application", type="secondary"):
-            conn = get_db_connection()
-            if conn:
-                cursor = conn.cursor()
-                cursor.execute("DELETE FROM applications WHERE job_id = %s AND applicant_id = %s",
-                               (int(selected_job['id']), st.session_state.user_id))
-                conn.commit()
-                st.success("Application withdrawn successfully!")
-                cursor.close()
-                conn.close()
-                st.session_state.view_job_details = None
-                st.rerun()
+            with db_connection() as conn:
+                if conn:
+                    withdraw_application(conn, has_applied['id'])
+                    st.success("Application withdrawn successfully!")
+                    st.session_state.view_job_details = None
+                    st.rerun()
     else:
         st.markdown("### Apply for this Job")
         name = st.text_input("Full Name")
@@ -270,31 +276,36 @@ def show_job_details(jobs_df):
         
         if st.button("Submit Application"):
             if uploaded_file and name and email and phone and nationality:
-                resume_text = ""
-                if uploaded_file.name.endswith('.txt'):
-                    try:
-                        resume_text = uploaded_file.read().decode('utf-8')
-                    except UnicodeDecodeError:
-                        resume_text = uploaded_file.read().decode('latin-1')
-                elif uploaded_file.name.endswith('.pdf'):
-                    pdf_reader = PyPDF2.PdfReader(uploaded_file)
-                    for page_num in range(len(pdf_reader.pages)):
-                        resume_text += pdf_reader.pages[page_num].extract_text() or ''
-                        
-                conn = get_db_connection()
-                if conn:
-                    cursor = conn.cursor()
-                    cursor.execute("""
-                        INSERT INTO applications 
-                        (job_id, applicant_id, name, email, phone, gender, nationality, resume_text) 
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                    """, (int(selected_job['id']), st.session_state.user_id, name, email, phone, gender, nationality, resume_text))
-                    conn.commit()
-                    st.success("Application submitted successfully!")
-                    cursor.close()
-                    conn.close()
-                    st.session_state.view_job_details = None
-                    st.rerun()
+                is_pdf = uploaded_file.name.lower().endswith('.pdf')
+                resume_parser = get_resume_parser()
+                if uploaded_file.size > MAX_RESUME_BYTES:
+                    st.warning(f"Resumes must be smaller than {MAX_RESUME_BYTES // (1024 * 1024)} MB.")
+                elif is_pdf and resume_parser.is_busy():
+                    st.warning("We are processing a lot of resumes right now. Please try again in a moment.")
+                else:
+                    resume_bytes = uploaded_file.getvalue()
+                    with db_connection() as conn:
+                        if conn:
+                            try:
+                                # Identical files are stored, and parsed, only once.
+                                resume = store_resume(conn, resume_bytes, uploaded_file.name,
+                                                      text=None if is_pdf else decode_text(resume_bytes))
+                                if is_pdf and resume['parse_status'] != 'done':
+                                    # Parsed in the background; the text is filled in when ready. A resume
+                                    # left 'pending' by a lost parse is queued again, unless it is in flight.
+                                    retry_resume(conn, resume['id'])
+                                    try:
+                                        resume_parser.submit(resume['id'], resume_bytes, uploaded_file.name)
+                                    except ParserBusy as err:
+                                        fail_resume_parse(conn, resume['id'], str(err))
+                                submit_application(conn, int(selected_job['id']), st.session_state.user_id,
+                                                   name, email, phone, gender, nationality, resume['id'])
+                            except mysql.connector.IntegrityError:
+                                st.warning("You have already applied for this job.")
+                            else:
+                                st.success("Application submitted successfully!")
+                                st.session_state.view_job_details = None
+                                st.rerun()
             else:
                 st.warning("Please fill in all details and upload your resume.")
     
@@ -304,179 +315,500 @@ def show_job_details(jobs_df):
 
 # --- Section 4: Recruiter Dashboard ---
 
+def export_controls(conn, export, label, params=()):
+    """Streams an export to a temporary file on request and offers it for download."""
+    state_key = "export_" + "_".join([export, *map(str, params)])
+    col_format, col_prepare = st.columns(2)
+    with col_format:
+        fmt = st.radio("Export format", EXPORT_FORMATS, horizontal=True, key=f"{state_key}_format")
+    with col_prepare:
+        if st.button(f"Export {label}", key=f"{state_key}_prepare"):
+            previous = st.session_state.pop(state_key, None)
+            if previous:
+                previous.discard()
+            with st.spinner("Exporting..."):
+                st.session_state[state_key] = export_to_tempfile(conn, export, fmt, params)
+    prepared = st.session_state.get(state_key)
+    if prepared and prepared.exists():
+        # Read only when clicked, then deleted; reruns before that never load the file.
+        st.download_button(f"Download {prepared.rows} rows ({prepared.fmt.upper()})", prepared.take,
+                           file_name=f"{export}.{prepared.fmt}", key=f"{state_key}_download")
+
+@st.fragment
+def show_hiring_analytics(recruiter_id=None):
+    """Renders the hiring funnel, time to each stage and daily applications.
+
+    Covers one recruiter's jobs, or all jobs for the admin. Only on request:
+    the charts are built when the toggle is on, and turning it on or off
+    reruns just this fragment.
+    """
+    st.markdown("### Hiring Analytics")
+    if not st.toggle("Show charts", key="show_hiring_analytics"):
+        return
+    try:
+        analytics = load_analytics(recruiter_id)
+    except mysql.connector.Error as err:
+        st.error(f"Could not load hiring analytics: {err}")
+        return
+    if not analytics['funnel']:
+        st.info("No applications yet.")
+        return
+
+    with profiler.section('hiring_analytics'):
+        col_funnel, col_durations = st.columns(2)
+        with col_funnel:
+            counts = analytics['funnel']
+            fig_funnel = px.funnel(
+                x=[counts.get(status, 0) for status in FUNNEL_STATUSES],
+                y=FUNNEL_STATUSES,
+                title='Applicants by Current Status',
+                labels={'x': 'Applicants', 'y': 'Status'}
+            )
+            st.plotly_chart(fig_funnel, use_container_width=True)
+            st.caption(f"Rejected: {counts.get('Rejected', 0)}")
+
+        with col_durations:
+            durations = analytics['stage_durations']
+            if durations.empty:
+                st.info("No applications have reached Interview or Hired since durations were first recorded.")
+            else:
+                fig_durations = px.bar(
+                    durations,
+                    x='time_to_stage',
+                    y='applications',
+                    color='stage',
+                    barmode='group',
+                    hover_data={'mean_days': ':.1f'},
+                    title='Time from Applying to Each Stage',
+                    labels={'time_to_stage': 'Time to Stage', 'applications': 'Applications'}
+                )
+                st.plotly_chart(fig_durations, use_container_width=True)
+
+        trend = analytics['daily_trend']
+        if not trend.empty:
+            fig_trend = px.line(
+                trend,
+                x='day',
+                y='applications',
+                color='company',
+                title=f'Applications per Day (last {TREND_DAYS} days)',
+                labels={'day': 'Day', 'applications': 'Applications', 'company': 'Company'}
+            )
+            st.plotly_chart(fig_trend, use_container_width=True)
+
 def show_recruiter_dashboard():
     """Renders the dashboard for recruiters."""
     st.subheader(f"Welcome, {st.session_state.user_role.capitalize()}! 👋")
     st.markdown("---")
 
-    conn = get_db_connection()
-    if conn:
-        st.markdown("### Your Job Postings")
-        my_jobs_df = pd.read_sql(f"SELECT id, title, company, job_role, job_description FROM jobs WHERE recruiter_id = {st.session_state.user_id}", conn)
+    analytics_slot = None
+    with db_connection() as conn:
+        if conn:
+            st.markdown("### Your Job Postings")
+            # Set at login: what arrived since the previous visit stays "new" for this one.
+            my_jobs_df = list_recruiter_jobs(conn, st.session_state.user_id,
+                                             new_since=st.session_state.get('applicants_seen_after'))
+            if 'new_applicants' in my_jobs_df and my_jobs_df['new_applicants'].sum():
+                st.info(f"{my_jobs_df['new_applicants'].sum()} new applicants since your last visit.")
         
-        if not my_jobs_df.empty:
-            jobs_to_delete = st.multiselect("Select job IDs to delete:", my_jobs_df['id'].tolist())
-            if st.button("Delete Selected Jobs", type="secondary"):
-                if jobs_to_delete:
-                    cursor = conn.cursor()
-                    for job_id in jobs_to_delete:
-                        # First, delete all applications related to the job
-                        cursor.execute("DELETE FROM applications WHERE job_id = %s", (job_id,))
-                        # Then, delete the job itself
-                        cursor.execute("DELETE FROM jobs WHERE id = %s", (job_id,))
-                    conn.commit()
-                    st.success(f"Successfully deleted {len(jobs_to_delete)} jobs and their applications.")
-                    st.rerun()
+            if not my_jobs_df.empty:
+                jobs_to_delete = st.multiselect("Select job IDs to delete:", my_jobs_df['id'].tolist())
+                if st.button("Delete Selected Jobs", type="secondary"):
+                    if jobs_to_delete:
+                        try:
+                            deleted = delete_jobs(conn, st.session_state.user_id, jobs_to_delete)
+                        except mysql.connector.Error as err:
+                            st.error(f"Could not delete jobs, nothing was changed: {err}")
+                        else:
+                            invalidate_job_board()
+                            st.success(f"Successfully deleted {deleted} jobs and their applications.")
+                            st.rerun()
+
+                st.dataframe(my_jobs_df, use_container_width=True)
 
-            st.dataframe(my_jobs_df.drop(columns=['job_description']), use_container_width=True)
+                # Filled after the block: the analytics loader checks out its own connection.
+                analytics_slot = st.container()
 
-            st.markdown("### View and Compare Applicants")
-            job_id_to_view = st.number_input("Enter Job ID to view applicants:", min_value=1, step=1, key="rec_job_id")
+                st.markdown("### View and Compare Applicants")
+                job_id_to_view = st.number_input("Enter Job ID to view applicants:", min_value=1, step=1, key="rec_job_id")
             
-            if st.button("View Applicants"):
-                st.session_state.view_applicants = job_id_to_view
+                if st.button("View Applicants"):
+                    st.session_state.view_applicants = job_id_to_view
             
-            if 'view_applicants' in st.session_state and st.session_state.view_applicants:
-                applicants_df = pd.read_sql(f"""
-                    SELECT 
-                        a.id AS application_id,
-                        u.username,
-                        a.name,
-                        a.email,
-                        a.phone,
-                        a.gender,
-                        a.nationality,
-                        a.status,
-                        a.resume_text
-                    FROM applications a
-                    JOIN users u ON a.applicant_id = u.id
-                    WHERE a.job_id = {st.session_state.view_applicants}
-                """, conn)
-
-                if not applicants_df.empty:
-                    st.success(f"Applicants found for Job ID: {st.session_state.view_applicants}")
-                    st.info(f"Total applicants: {len(applicants_df)}")
+                if 'view_applicants' in st.session_state and st.session_state.view_applicants:
+                    viewed_job_id = int(st.session_state.view_applicants)
+                    breakdown = applicant_breakdown(conn, viewed_job_id)
+
+                    if breakdown['total']:
+                        st.success(f"Applicants found for Job ID: {viewed_job_id}")
+                        st.info(f"Total applicants: {breakdown['total']}")
                     
-                    st.markdown("#### Graphical Comparison of Applicants")
-                    col_graphs = st.columns(3)
-                    with col_graphs[0]:
-                        gender_counts = applicants_df['gender'].value_counts()
-                        fig_gender = px.pie(
-                            names=gender_counts.index,
-                            values=gender_counts.values,
-                            title='Gender Distribution',
-                            hole=0.4
-                        )
-                        st.plotly_chart(fig_gender, use_container_width=True)
+                        with profiler.section('applicant_charts'):
+                            st.markdown("#### Graphical Comparison of Applicants")
+                            col_graphs = st.columns(3)
+                            with col_graphs[0]:
+                                gender_counts = breakdown['gender']
+                                fig_gender = px.pie(
+                                    names=gender_counts.index,
+                                    values=gender_counts.values,
+                                    title='Gender Distribution',
+                                    hole=0.4
+                                )
+                                st.plotly_chart(fig_gender, use_container_width=True)
                     
-                    with col_graphs[1]:
-                        nationality_counts = applicants_df['nationality'].value_counts()
-                        fig_nationality = px.bar(
-                            x=nationality_counts.index,
-                            y=nationality_counts.values,
-                            title='Nationality of Applicants',
-                            labels={'x': 'Nationality', 'y': 'Number of Applicants'},
-                            color=nationality_counts.index
-                        )
-                        st.plotly_chart(fig_nationality, use_container_width=True)
+                            with col_graphs[1]:
+                                nationality_counts = breakdown['nationality']
+                                fig_nationality = px.bar(
+                                    x=nationality_counts.index,
+                                    y=nationality_counts.values,
+                                    title='Nationality of Applicants',
+                                    labels={'x': 'Nationality', 'y': 'Number of Applicants'},
+                                    color=nationality_counts.index
+                                )
+                                st.plotly_chart(fig_nationality, use_container_width=True)
                     
-                    with col_graphs[2]:
-                        status_counts = applicants_df['status'].value_counts()
-                        fig_status = px.pie(
-                            names=status_counts.index,
-                            values=status_counts.values,
-                            title='Application Statuses',
-                            hole=0.4
-                        )
-                        st.plotly_chart(fig_status, use_container_width=True)
+                            with col_graphs[2]:
+                                status_counts = breakdown['status']
+                                fig_status = px.pie(
+                                    names=status_counts.index,
+                                    values=status_counts.values,
+                                    title='Application Statuses',
+                                    hole=0.4
+                                )
+                                st.plotly_chart(fig_status, use_container_width=True)
                         
-                    st.markdown("#### Candidate List")
-                    st.dataframe(applicants_df[['name', 'email', 'phone', 'status', 'resume_text']], use_container_width=True)
+                        st.markdown("#### Candidate List")
+                        page_count = -(-breakdown['total'] // APPLICANT_PAGE_SIZE)
+                        applicant_page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count,
+                                                         value=1, step=1, key=f"applicant_page_{viewed_job_id}")
+                        applicants_df = list_applicants_page(conn, viewed_job_id, page=applicant_page - 1)
+                        st.dataframe(
+                            applicants_df[['name', 'email', 'phone', 'status', 'skill_score', 'parse_status']],
+                            column_config={'skill_score': st.column_config.ProgressColumn("Skill Match", min_value=0.0, max_value=1.0, format="percent")},
+                            use_container_width=True,
+                        )
+
+                        export_controls(conn, 'job_applicants', "all applicants", (viewed_job_id,))
+
+                        selected_on_page = st.multiselect(
+                            "Select applicants on this page:", applicants_df['application_id'].tolist(),
+                            format_func=dict(zip(applicants_df['application_id'], applicants_df['name'])).get,
+                            key=f"bulk_select_{viewed_job_id}")
+                        page_status = st.selectbox("New status for selected applicants:", APPLICATION_STATUSES,
+                                                   key=f"bulk_select_status_{viewed_job_id}")
+                        if st.button("Update Selected", disabled=not selected_on_page):
+                            changed = update_statuses(conn, selected_on_page, page_status)
+                            st.success(f"Updated {changed} applicants to {page_status}.")
+                            st.rerun()
+
+                        st.markdown("#### Bulk Status Update")
+                        col_filters = st.columns(3)
+                        with col_filters[0]:
+                            filter_statuses = st.multiselect("Current status", APPLICATION_STATUSES,
+                                                             key=f"bulk_statuses_{viewed_job_id}")
+                        with col_filters[1]:
+                            filter_nationalities = st.multiselect("Nationality", breakdown['nationality'].index.tolist(),
+                                                                  key=f"bulk_nationalities_{viewed_job_id}")
+                        with col_filters[2]:
+                            score_range = st.slider("Skill match (%)", 0, 100, (0, 100), key=f"bulk_score_{viewed_job_id}")
+                        # The full range leaves unscored applicants in; any narrower range requires a score.
+                        bulk_filters = {
+                            'statuses': filter_statuses,
+                            'nationalities': filter_nationalities,
+                            'min_score': score_range[0] / 100 if score_range != (0, 100) else None,
+                            'max_score': score_range[1] / 100 if score_range != (0, 100) else None,
+                        }
+                        matching = count_applicants(conn, viewed_job_id, **bulk_filters)
+                        bulk_status = st.selectbox("Set status to:", APPLICATION_STATUSES, key=f"bulk_status_{viewed_job_id}")
+                        if st.button(f"Apply to {matching} matching applicants", disabled=not matching):
+                            changed = update_status_by_filter(conn, viewed_job_id, bulk_status, **bulk_filters)
+                            st.success(f"Updated {changed} applicants to {bulk_status}.")
+                            st.rerun()
+
+                        with profiler.section('rank_candidates'):
+                            st.markdown("#### Rank Candidates")
+                            query_key = f"rank_query_{viewed_job_id}"
+                            if query_key not in st.session_state:
+                                # The job is read only to seed the box; later reruns keep what is typed in it.
+                                ranked_job = get_job(conn, viewed_job_id)
+                                st.session_state[query_key] = (ranked_job or {}).get('skills_required') or ""
+                            search_query = st.text_input("Search resumes (defaults to the job's required skills):",
+                                                         key=query_key)
+                            top_k = st.number_input("Show top", min_value=1, max_value=200, value=10, step=1, key="rank_top_k")
+                            ranked = search_applicants(conn, viewed_job_id, search_query, limit=int(top_k))
+                            if ranked:
+                                st.dataframe(pd.DataFrame(ranked), use_container_width=True, hide_index=True)
+                            else:
+                                st.info("No resumes match this search.")
                     
-                    st.markdown("#### Manage Individual Applicants")
-                    selected_applicant_name = st.selectbox("Select an applicant by name:", applicants_df['name'].unique())
+                        st.markdown("#### Manage Individual Applicants")
+                        applicant_names = {
+                            application_id: f"{name} ({email})"
+                            for application_id, name, email in zip(applicants_df['application_id'], applicants_df['name'], applicants_df['email'])
+                        }
+                        selected_application_id = st.selectbox("Select an applicant from this page:", list(applicant_names),
+                                                               format_func=applicant_names.get)
+                        selected_app = get_application(conn, int(selected_application_id)) if selected_application_id else None
                     
-                    if selected_applicant_name:
-                        selected_app = applicants_df[applicants_df['name'] == selected_applicant_name].iloc[0]
-                        
-                        st.write(f"**Viewing details for:** {selected_app['name']}")
-                        
-                        st.info("Applicant's resume is displayed below.")
-                        st.text_area("Resume Content", value=selected_app['resume_text'], height=300)
+                        if selected_app:
+                            st.write(f"**Viewing details for:** {selected_app['name']}")
+                            if selected_app['parse_status'] == 'pending':
+                                st.info("This applicant's resume is still being processed.")
+                            elif selected_app['parse_status'] == 'failed':
+                                st.warning(f"This applicant's resume could not be read: {selected_app['parse_error']}")
+                            elif selected_app['resume_id'] and st.checkbox("Open resume", key=f"open_resume_{selected_app['application_id']}"):
+                                st.text_area("Resume Content", value=load_resume_text(conn, selected_app['resume_id']), height=300)
+                                resume_filename, resume_original = load_original(conn, selected_app['resume_id'])
+                                st.download_button("Download original file", resume_original, file_name=resume_filename)
                         
-                        new_status = st.selectbox("Update Status:", ['Pending', 'In Review', 'Interview', 'Rejected', 'Hired'], index=['Pending', 'In Review', 'Interview', 'Rejected', 'Hired'].index(selected_app['status']))
+                            new_status = st.selectbox("Update Status:", APPLICATION_STATUSES, index=APPLICATION_STATUSES.index(selected_app['status']))
                         
-                        if st.button("Update Status"):
-                            cursor = conn.cursor()
-                            application_id_to_update = int(selected_app['application_id']) 
-                            cursor.execute("UPDATE applications SET status = %s WHERE id = %s", (new_status, application_id_to_update))
-                            conn.commit()
-                            st.success(f"Status for {selected_applicant_name} updated to {new_status}!")
-                            st.rerun()
+                            if st.button("Update Status"):
+                                update_statuses(conn, [selected_app['application_id']], new_status)
+                                st.success(f"Status for {selected_app['name']} updated to {new_status}!")
+                                st.rerun()
 
-                else:
-                    st.info(f"No applicants have applied for Job ID {st.session_state.view_applicants} yet.")
-        else:
-            st.info("You have not posted any jobs yet.")
+                    else:
+                        st.info(f"No applicants have applied for Job ID {viewed_job_id} yet.")
+            else:
+                st.info("You have not posted any jobs yet.")
         
-        st.markdown("---")
-        st.markdown("### Post a New Job")
-        with st.form("new_job_form"):
-            company = st.text_input("Company Name")
-            job_role = st.text_input("Job Role")
-            job_description = st.text_area("Job Description")
-            skills_required = st.text_area("Skills Required (e.g., Python, SQL, AWS)")
-            salary = st.text_input("Salary Structure")
+            st.markdown("---")
+            st.markdown("### Post a New Job")
+            with st.form("new_job_form"):
+                company = st.text_input("Company Name")
+                job_role = st.text_input("Job Role")
+                job_description = st.text_area("Job Description")
+                skills_required = st.text_area("Skills Required (e.g., Python, SQL, AWS)")
+                salary = st.text_input("Salary Structure")
             
-            submitted = st.form_submit_button("Post Job", type="primary")
+                submitted = st.form_submit_button("Post Job", type="primary")
             
-            if submitted:
-                if company and job_role and job_description and skills_required and salary:
-                    cursor = conn.cursor()
-                    cursor.execute("""
-                        INSERT INTO jobs (recruiter_id, title, company, job_role, job_description, skills_required, salary, description) 
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                    """, (st.session_state.user_id, job_role, company, job_role, job_description, skills_required, salary, job_description))
-                    conn.commit()
-                    st.success("Job posted successfully!")
-                    st.rerun()
-                else:
-                    st.warning("Please fill in all fields to post a job.")
+                if submitted:
+                    if company and job_role and job_description and skills_required and salary:
+                        post_job(conn, st.session_state.user_id, company, job_role, job_description, skills_required, salary)
+                        invalidate_job_board()
+                        st.success("Job posted successfully!")
+                        st.rerun()
+                    else:
+                        st.warning("Please fill in all fields to post a job.")
 
-    conn.close()
+    if analytics_slot is not None:
+        with analytics_slot:
+            show_hiring_analytics(st.session_state.user_id)
 
 
 # --- Section 5: Admin Dashboard ---
 
+ADMIN_FILTER_CHOICES = {
+    'role': ['applicant', 'recruiter', 'admin'],
+    'status': APPLICATION_STATUSES,
+}
+
+def admin_table_browser(title, table):
+    """Renders one admin table a page at a time, with filters and sorting done in SQL.
+
+    The page is read on a connection of its own, released before the cached
+    total is looked up, since that may check out another.
+    """
+    st.markdown(f"### {title}")
+    spec = ADMIN_TABLES[table]
+    controls = st.columns(len(spec['filters']) + 2)
+    filters = {}
+    for col, column in zip(controls, spec['filters']):
+        label = column.replace('_', ' ').title()
+        with col:
+            if column in ADMIN_FILTER_CHOICES:
+                filters[column] = st.selectbox(label, [""] + ADMIN_FILTER_CHOICES[column], key=f"admin_{table}_{column}")
+            else:
+                filters[column] = st.text_input(f"{label} starts with", key=f"admin_{table}_{column}").strip()
+    with controls[-2]:
+        sort = st.selectbox("Sort by", spec['sorts'], key=f"admin_{table}_sort")
+    with controls[-1]:
+        descending = st.checkbox("Descending", value=True, key=f"admin_{table}_desc")
+
+    # Changing any filter or the sort order starts again from the first page.
+    active_filters = tuple((column, value) for column, value in filters.items() if value)
+    query = (active_filters, sort, descending)
+    cursors_key = f"admin_{table}_cursors"
+    if st.session_state.get(f"admin_{table}_query") != query:
+        st.session_state[f"admin_{table}_query"] = query
+        st.session_state[cursors_key] = [None]
+    cursors = st.session_state[cursors_key]
+
+    with db_connection() as conn:
+        if not conn:
+            return
+        page_df, next_after = browse(conn, table, dict(active_filters), sort, descending, cursors[-1])
+    try:
+        total = load_count(table, active_filters)
+    except mysql.connector.Error as err:
+        st.error(f"Could not count {table}: {err}")
+        return
+    st.caption(f"{total} rows · page {len(cursors)} of {max(1, -(-total // ADMIN_PAGE_SIZE))}")
+    st.dataframe(page_df, use_container_width=True, hide_index=True)
+
+    col_prev, col_next = st.columns(2)
+    with col_prev:
+        if len(cursors) > 1 and st.button("← Previous", key=f"admin_{table}_prev"):
+            cursors.pop()
+            st.rerun()
+    with col_next:
+        if next_after is not None and st.button("Next →", key=f"admin_{table}_next"):
+            cursors.append(next_after)
+            st.rerun()
+
+def admin_bulk_import(conn):
+    """Imports jobs or applications from an uploaded CSV or JSONL file."""
+    st.markdown("### Bulk Import")
+    col_kind, col_batch = st.columns(2)
+    with col_kind:
+        kind = st.selectbox("Import", list(IMPORT_FIELDS), format_func=str.capitalize, key="import_kind")
+    with col_batch:
+        batch_size = st.number_input("Batch size", min_value=1, max_value=10000, value=DEFAULT_BATCH_SIZE, step=100,
+                                     key="import_batch_size")
+    st.caption(f"Fields: {', '.join(IMPORT_FIELDS[kind])}. Uploaded files can carry resumes as resume_text; "
+               "use bulk_import.py to import resume files.")
+    default_recruiter = st.text_input("Recruiter for jobs that do not name one", key="import_recruiter") if kind == 'jobs' else None
+    uploaded_import = st.file_uploader("CSV or JSONL file", type=["csv", "jsonl"], key="import_file")
+    if uploaded_import and st.button("Start Import"):
+        progress = st.progress(0.0, text="Importing...")
+
+        def report(stats):
+            done = uploaded_import.tell() / uploaded_import.size if uploaded_import.size else 1.0
+            progress.progress(min(done, 1.0), text=f"{stats['records']} records: {stats['inserted']} inserted, "
+                                                   f"{stats['skipped']} already present, {stats['rejected']} rejected")
+
+        fmt = 'csv' if uploaded_import.name.lower().endswith('.csv') else 'jsonl'
+        try:
+            stats = run_import(conn, kind, io.TextIOWrapper(uploaded_import, encoding='utf-8', newline=''), fmt,
+                               source=uploaded_import.name, batch_size=int(batch_size),
+                               default_recruiter=default_recruiter or None, on_progress=report)
+        except (mysql.connector.Error, UnicodeDecodeError) as err:
+            st.error(f"Import stopped, batches before the failing one were kept: {err}")
+        else:
+            progress.progress(1.0, text="Import finished.")
+            if kind == 'jobs' and stats['inserted']:
+                invalidate_job_board()
+            st.success(f"Imported {stats['inserted']} {kind} from {stats['records']} records "
+                       f"({stats['skipped']} already present, {stats['rejected']} rejected).")
+            if stats['rejects']:
+                st.dataframe(pd.DataFrame(stats['rejects'], columns=['record', 'reason']), hide_index=True)
+
 def show_admin_dashboard():
     """Renders the dashboard for the admin."""
     st.subheader(f"Welcome, {st.session_state.user_role.capitalize()}! 👋")
 
-    conn = get_db_connection()
-    if conn:
-        st.markdown("### All Users")
-        users_df = pd.read_sql("SELECT id, username, role FROM users", conn)
-        st.dataframe(users_df, use_container_width=True)
-
-        st.markdown("### All Job Postings")
-        jobs_df = pd.read_sql("SELECT j.id, u.username AS recruiter, j.title, j.description FROM jobs j JOIN users u ON j.recruiter_id = u.id", conn)
-        st.dataframe(jobs_df, use_container_width=True)
-
-        st.markdown("### All Applications")
-        applications_df = pd.read_sql("SELECT a.id, u.username AS applicant, j.title AS job_title, a.status FROM applications a JOIN users u ON a.applicant_id = u.id JOIN jobs j ON a.job_id = j.id", conn)
-        st.dataframe(applications_df, use_container_width=True)
-
-    conn.close()
+    admin_table_browser("All Users", 'users')
+    admin_table_browser("All Job Postings", 'jobs')
+    with db_connection() as conn:
+        if conn:
+            export_controls(conn, 'jobs', "all jobs")
+    admin_table_browser("All Applications", 'applications')
+    with db_connection() as conn:
+        if conn:
+            export_controls(conn, 'applications', "all applications")
+            admin_bulk_import(conn)
+
+    show_hiring_analytics()
+    show_analytics_reconciliation()
+
+    st.markdown("### Connection Pool")
+    pool_stats = get_pool().stats()
+    col_pool = st.columns(5)
+    col_pool[0].metric("Open / Size", f"{pool_stats['opened']} / {pool_stats['size']}")
+    col_pool[1].metric("In Use (peak)", f"{pool_stats['in_use']} ({pool_stats['high_water']})")
+    col_pool[2].metric("Checkouts", pool_stats['checkouts'])
+    col_pool[3].metric("Waits (timeouts)", f"{pool_stats['waits']} ({pool_stats['timeouts']})")
+    col_pool[4].metric("Reconnects", pool_stats['reconnects'])
+
+    st.markdown("### Startup")
+    col_startup = st.columns(len(bootstrap_report['step_seconds']) + 1)
+    col_startup[0].metric("Cold Start", f"{bootstrap_report['total_seconds'] * 1000:.0f} ms")
+    for col, (step, seconds) in zip(col_startup[1:], bootstrap_report['step_seconds'].items()):
+        col.metric(step.replace('_', ' ').title(), f"{seconds * 1000:.0f} ms")
+    st.caption(f"Process started {bootstrap_report['finished_at']:%Y-%m-%d %H:%M:%S}; "
+               f"migrations applied: {bootstrap_report['migrations_applied'] or 'none'}")
+
+    st.markdown("### Resume Parsing")
+    parse_stats = get_resume_parser().stats()
+    col_parse = st.columns(5)
+    col_parse[0].metric("Queued", parse_stats['queued'])
+    col_parse[1].metric("In Progress", parse_stats['in_flight'])
+    col_parse[2].metric("Completed", parse_stats['completed'])
+    col_parse[3].metric("Failed (timeouts)", f"{parse_stats['failed']} ({parse_stats['timeouts']})")
+    col_parse[4].metric("Parse Time p50 / p95", f"{parse_stats['parse_p50_seconds']:.2f}s / {parse_stats['parse_p95_seconds']:.2f}s")
+
+    show_performance_panel()
+
+def show_analytics_reconciliation():
+    """Shows when the analytics summary tables were last checked against the raw rows."""
+    st.markdown("### Analytics Reconciliation")
+    reconciler = get_reconciler()
+    if st.button("Reconcile Now"):
+        try:
+            reconciler.run_now()
+        except mysql.connector.Error as err:
+            st.error(f"Reconciliation failed: {err}")
+        else:
+            load_analytics.clear()
+    report = reconciler.last_report()
+    if report:
+        col_reconcile = st.columns(len(report['drift']) + 1)
+        col_reconcile[0].metric("Took", f"{report['seconds'] * 1000:.0f} ms")
+        for col, (table, rows) in zip(col_reconcile[1:], report['drift'].items()):
+            col.metric(table.removeprefix('analytics_').replace('_', ' ').title() + " Drift", rows)
+        st.caption(f"Last reconciled {report['finished_at']:%Y-%m-%d %H:%M:%S}; "
+                   f"runs every {reconciler.interval / 60:.0f} minutes.")
+    else:
+        st.caption(f"Not reconciled since the app started; runs every {reconciler.interval / 60:.0f} minutes.")
+
+def show_performance_panel():
+    """Renders query and render timings for the admin."""
+    st.markdown("### Performance")
+    st.caption(f"Queries slower than {profiler.slow_query_seconds * 1000:.0f} ms are logged as slow. "
+               "Percentiles cover the most recent samples of each statement.")
+    last_rerun = st.session_state.get('last_rerun_profile')
+    if last_rerun:
+        st.markdown("#### Previous Rerun")
+        col_rerun = st.columns(5)
+        col_rerun[0].metric("Rerun", f"{last_rerun['seconds'] * 1000:.0f} ms")
+        col_rerun[1].metric("Queries", len(last_rerun['queries']))
+        col_rerun[2].metric("Query Time", f"{last_rerun['query_seconds'] * 1000:.0f} ms")
+        col_rerun[3].metric("Rows Fetched", last_rerun['rows'])
+        col_rerun[4].metric("Bytes Fetched", f"{last_rerun['bytes'] / 1024:.1f} KB")
+        st.dataframe(pd.DataFrame(last_rerun['sections'] + last_rerun['queries']), use_container_width=True, hide_index=True)
+
+    snapshot = profiler.snapshot()
+    for heading, series, label in (("Render Sections", snapshot['sections'], 'section'),
+                                   ("Queries", snapshot['queries'], 'fingerprint')):
+        st.markdown(f"#### {heading}")
+        if series:
+            table = pd.DataFrame.from_dict(series, orient='index').rename_axis(label).reset_index()
+            st.dataframe(table.sort_values('total_seconds', ascending=False), use_container_width=True, hide_index=True)
+        else:
+            st.info("Nothing recorded yet.")
+    if st.button("Reset Performance Counters"):
+        profiler.reset()
+        st.rerun()
 
 # --- Main App Logic (Streamlit's "pages") ---
 
-if not st.session_state.logged_in:
-    login_form()
-else:
-    logout_button()
-    if st.session_state.user_role == "applicant":
-        show_applicant_dashboard()
-    elif st.session_state.user_role == "recruiter":
-        show_recruiter_dashboard()
-    elif st.session_state.user_role == "admin":
-        show_admin_dashboard()
+try:
+    if not st.session_state.logged_in:
+        with profiler.section('login_form'):
+            login_form()
+    else:
+        logout_button()
+        if st.session_state.user_role == "applicant":
+            with profiler.section('applicant_dashboard'):
+                show_applicant_dashboard()
+        elif st.session_state.user_role == "recruiter":
+            with profiler.section('recruiter_dashboard'):
+                show_recruiter_dashboard()
+        elif st.session_state.user_role == "admin":
+            with profiler.section('admin_dashboard'):
+                show_admin_dashboard()
+finally:
+    # Also reached when a section ends the run early with st.rerun().
+    st.session_state.last_rerun_profile = profiler.rerun_finished()
@@ -0,0 +1,368 @@
+"""Application queries shared by the applicant and recruiter dashboards."""
+import pandas as pd
+
+from analytics import database_now, record_applied, record_removed, record_status_change
+from db import dialect
+from events import record_events
+from resume_store import compress_text, decompress_text
+from search import index_application, unindex_application
+from skills import extract_resume_skills, match_score
+
+APPLICANT_PAGE_SIZE = 50
+APPLICATION_STATUSES = ['Pending', 'In Review', 'Interview', 'Rejected', 'Hired']
+STATUS_BATCH_SIZE = 1000  # application IDs per IN (...) list
+APPLICANT_LIST_COLUMNS = ['application_id', 'username', 'name', 'email', 'phone', 'gender',
+                          'nationality', 'status', 'parse_status', 'skill_score']
+
+
+def find_application(conn, job_id, applicant_id):
+    """Returns the applicant's application to a job as {'id', 'status'}, or None.
+
+    A single probe of the (job_id, applicant_id) unique index.
+    """
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("SELECT id, status FROM applications WHERE job_id = %s AND applicant_id = %s",
+                   (job_id, applicant_id))
+    application = cursor.fetchone()
+    cursor.close()
+    return application
+
+
+def submit_application(conn, job_id, applicant_id, name, email, phone, gender, nationality, resume_id):
+    """Inserts an application for a stored resume, then commits.
+
+    The application inherits the resume's parse status and, if the resume's
+    text is already known, is indexed at once. A resume still
+    'pending' is completed for every application referencing it by
+    complete_resume_parse(); the resume row is locked while the application is
+    inserted so a parse finishing at the same moment cannot miss it.
+    Returns the new application's ID. Applying twice to the same job raises
+    mysql.connector.IntegrityError from the (job_id, applicant_id) unique key.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT parse_status, parse_error, text_zlib, skill_ids FROM resumes WHERE id = %s FOR UPDATE",
+                   (resume_id,))
+    parse_status, parse_error, text_zlib, resume_skills = cursor.fetchone()
+    try:
+        cursor.execute("""
+            INSERT INTO applications
+            (job_id, applicant_id, name, email, phone, gender, nationality, resume_id, parse_status, parse_error)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, (job_id, applicant_id, name, email, phone, gender, nationality, resume_id, parse_status, parse_error))
+        application_id = cursor.lastrowid
+        record_events(cursor, 'applied', "id = %s", (application_id,))
+        record_applied(cursor, "id = %s", (application_id,))
+        if parse_status == 'done':
+            resume_text = decompress_text(text_zlib)
+            _index_resume(conn, application_id, job_id, resume_text,
+                          _resume_skills(conn, resume_id, resume_text, resume_skills))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return application_id
+
+
+def _application_ids(cursor, pairs):
+    """Maps each (job_id, applicant_id) of ``pairs`` that has applied onto the application's ID."""
+    if dialect(cursor) == 'mysql':
+        # One unique-key lookup per pair.
+        cursor.execute(f"""
+            SELECT job_id, applicant_id, id FROM applications
+            WHERE (job_id, applicant_id) IN ({', '.join(['(%s, %s)'] * len(pairs))})
+        """, tuple(value for pair in pairs for value in pair))
+        return {(job_id, applicant_id): application_id for job_id, applicant_id, application_id in cursor.fetchall()}
+    # SQLite scans the index for a row-value list and limits how deep an OR-ed
+    # spelling of it may nest, so it gets one index seek per job instead.
+    by_job = {}
+    for job_id, applicant_id in pairs:
+        by_job.setdefault(job_id, []).append(applicant_id)
+    ids = {}
+    for job_id, applicant_ids in by_job.items():
+        cursor.execute(f"""
+            SELECT applicant_id, id FROM applications
+            WHERE job_id = %s AND applicant_id IN ({', '.join(['%s'] * len(applicant_ids))})
+        """, (job_id, *applicant_ids))
+        ids.update(((job_id, applicant_id), application_id) for applicant_id, application_id in cursor.fetchall())
+    return ids
+
+
+def insert_applications(conn, applications):
+    """Bulk-inserts applications for stored resumes and indexes them. The caller commits.
+
+    Each application is a dict with job_id, applicant_id, name, email, phone,
+    gender, nationality, status and resume_id; it inherits its resume's parse
+    status as in submit_application(). An applicant who already applied to
+    the job is skipped, so re-running an import is harmless. Returns the
+    number of applications inserted.
+    """
+    if not applications:
+        return 0
+    # The first application per (job, applicant) wins, as with submit_application().
+    unique = {}
+    for application in applications:
+        unique.setdefault((application['job_id'], application['applicant_id']), application)
+    pairs = list(unique)
+    cursor = conn.cursor()
+    existing = set(_application_ids(cursor, pairs))
+    applications = [application for pair, application in unique.items() if pair not in existing]
+    if not applications:
+        cursor.close()
+        return 0
+
+    resume_ids = list({application['resume_id'] for application in applications})
+    cursor.execute(f"SELECT id, parse_status, parse_error FROM resumes WHERE id IN ({', '.join(['%s'] * len(resume_ids))})",
+                   tuple(resume_ids))
+    resumes = {resume_id: (parse_status, parse_error) for resume_id, parse_status, parse_error in cursor.fetchall()}
+    cursor.executemany("""
+        INSERT INTO applications
+        (job_id, applicant_id, name, email, phone, gender, nationality, status, resume_id, parse_status, parse_error)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """, [(application['job_id'], application['applicant_id'], application['name'], application['email'],
+           application['phone'], application['gender'], application['nationality'], application['status'],
+           application['resume_id'], *resumes[application['resume_id']]) for application in applications])
+    inserted = cursor.rowcount
+
+    new_ids = list(_application_ids(cursor, [pair for pair in pairs if pair not in existing]).values())
+    where = f"id IN ({', '.join(['%s'] * len(new_ids))})"
+    record_events(cursor, 'applied', where, new_ids)
+    record_applied(cursor, where, new_ids)
+    cursor.execute(f"""
+        SELECT a.id, a.job_id, a.resume_id, r.text_zlib, r.skill_ids FROM applications a
+        JOIN resumes r ON r.id = a.resume_id
+        WHERE a.id IN ({', '.join(['%s'] * len(new_ids))}) AND a.parse_status = 'done'
+    """, tuple(new_ids))
+    resume_skills = {}
+    for application_id, job_id, resume_id, text_zlib, stored_skills in cursor.fetchall():
+        resume_text = decompress_text(text_zlib)
+        if resume_id not in resume_skills:
+            resume_skills[resume_id] = _resume_skills(conn, resume_id, resume_text, stored_skills)
+        _index_resume(conn, application_id, job_id, resume_text, resume_skills[resume_id])
+    cursor.close()
+    return inserted
+
+
+def complete_resume_parse(conn, resume_id, resume_text, commit=True):
+    """Stores a pending resume's parsed text and skills, then commits.
+
+    Every application using the resume is indexed as well. Does nothing if
+    the resume is no longer pending. With ``commit=False`` the caller commits.
+    """
+    resume_skills = extract_resume_skills(conn, resume_text)
+    cursor = conn.cursor()
+    cursor.execute("""
+        UPDATE resumes SET text_zlib = %s, skill_ids = %s, parse_status = 'done', parse_error = NULL
+        WHERE id = %s AND parse_status = 'pending'
+    """, (compress_text(resume_text), resume_skills, resume_id))
+    if cursor.rowcount:
+        cursor.execute("SELECT id, job_id FROM applications WHERE resume_id = %s AND parse_status = 'pending'",
+                       (resume_id,))
+        for application_id, job_id in cursor.fetchall():
+            cursor.execute("UPDATE applications SET parse_status = 'done', parse_error = NULL WHERE id = %s",
+                           (application_id,))
+            _index_resume(conn, application_id, job_id, resume_text, resume_skills)
+    cursor.close()
+    if commit:
+        conn.commit()
+
+
+def fail_resume_parse(conn, resume_id, reason, commit=True):
+    """Marks a pending resume, and every pending application using it, as unreadable.
+
+    Commits unless ``commit`` is False.
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        UPDATE resumes SET parse_status = 'failed', parse_error = %s
+        WHERE id = %s AND parse_status = 'pending'
+    """, (reason[:255], resume_id))
+    cursor.execute("""
+        UPDATE applications SET parse_status = 'failed', parse_error = %s
+        WHERE resume_id = %s AND parse_status = 'pending'
+    """, (reason[:255], resume_id))
+    cursor.close()
+    if commit:
+        conn.commit()
+
+
+def _resume_skills(conn, resume_id, resume_text, stored):
+    """A resume's packed skill set.
+
+    ``stored`` if it was extracted before, else extracted now and kept.
+    """
+    if stored is not None:
+        return stored
+    resume_skills = extract_resume_skills(conn, resume_text)
+    cursor = conn.cursor()
+    cursor.execute("UPDATE resumes SET skill_ids = %s WHERE id = %s", (resume_skills, resume_id))
+    cursor.close()
+    return resume_skills
+
+
+def _index_resume(conn, application_id, job_id, resume_text, resume_skills):
+    """Derives everything that depends on resume text: search postings and skill score.
+
+    ``resume_skills`` is the resume's packed skill set, extracted once per resume.
+    """
+    index_application(conn, application_id, job_id, resume_text)
+    cursor = conn.cursor()
+    cursor.execute("SELECT skill_ids FROM jobs WHERE id = %s", (job_id,))
+    row = cursor.fetchone()
+    cursor.execute("UPDATE applications SET skill_ids = %s, skill_score = %s WHERE id = %s",
+                   (resume_skills, match_score(row[0] if row else None, resume_skills), application_id))
+    cursor.close()
+
+
+def withdraw_application(conn, application_id):
+    """Deletes an application along with its search postings, then commits."""
+    unindex_application(conn, application_id)
+    cursor = conn.cursor()
+    record_events(cursor, 'withdrawn', "id = %s", (application_id,))
+    record_removed(cursor, "id = %s", (application_id,))
+    cursor.execute("DELETE FROM applications WHERE id = %s", (application_id,))
+    cursor.close()
+    conn.commit()
+
+
+def applicant_breakdown(conn, job_id):
+    """Counts a job's applicants by gender, nationality and status.
+
+    The grouping runs in SQL, so only one small row per distinct combination
+    leaves the database. Returns a dict with a Series of counts (largest
+    first) for each of 'gender', 'nationality' and 'status', plus 'total'.
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT gender, nationality, status, COUNT(*) FROM applications
+        WHERE job_id = %s
+        GROUP BY gender, nationality, status
+    """, (job_id,))
+    groups = pd.DataFrame(cursor.fetchall(), columns=['gender', 'nationality', 'status', 'count'])
+    cursor.close()
+    breakdown = {
+        column: groups.groupby(column)['count'].sum().sort_values(ascending=False)
+        for column in ('gender', 'nationality', 'status')
+    }
+    breakdown['total'] = int(groups['count'].sum())
+    return breakdown
+
+
+def list_applicants_page(conn, job_id, page=0, limit=APPLICANT_PAGE_SIZE):
+    """Returns one page of a job's applicants, best skill match first, unscored last.
+
+    Resume text is deliberately left out; use get_application() for the one
+    applicant being viewed.
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT a.id, u.username, a.name, a.email, a.phone, a.gender,
+               a.nationality, a.status, a.parse_status, a.skill_score
+        FROM applications a
+        JOIN users u ON a.applicant_id = u.id
+        WHERE a.job_id = %s
+        ORDER BY a.skill_score DESC, a.id DESC
+        LIMIT %s OFFSET %s
+    """, (job_id, limit, page * limit))
+    applicants = pd.DataFrame(cursor.fetchall(), columns=APPLICANT_LIST_COLUMNS)
+    cursor.close()
+    return applicants
+
+
+def _applicant_filter(job_id, statuses=None, nationalities=None, min_score=None, max_score=None):
+    """WHERE clause and parameters selecting a job's applicants by filter.
+
+    Empty filters match everything; a score bound excludes unscored applicants.
+    """
+    clauses, params = ["job_id = %s"], [job_id]
+    for column, values in (('status', statuses), ('nationality', nationalities)):
+        if values:
+            clauses.append(f"{column} IN ({', '.join(['%s'] * len(values))})")
+            params.extend(values)
+    if min_score is not None:
+        clauses.append("skill_score >= %s")
+        params.append(min_score)
+    if max_score is not None:
+        clauses.append("skill_score <= %s")
+        params.append(max_score)
+    return " AND ".join(clauses), params
+
+
+def count_applicants(conn, job_id, **filters):
+    """Counts the applicants of a job matching _applicant_filter() ``filters``."""
+    where, params = _applicant_filter(job_id, **filters)
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT COUNT(*) FROM applications WHERE {where}", tuple(params))
+    total = cursor.fetchone()[0]
+    cursor.close()
+    return total
+
+
+def update_statuses(conn, application_ids, status):
+    """Sets the status of many applications, then commits. Returns the rows changed.
+
+    Applications already in ``status`` are left alone and get no event.
+    """
+    if status not in APPLICATION_STATUSES:
+        raise ValueError(f"Unknown application status {status!r}.")
+    application_ids = list(dict.fromkeys(int(application_id) for application_id in application_ids))
+    cursor = conn.cursor()
+    changed = 0
+    try:
+        changed_at = database_now(cursor)
+        for start in range(0, len(application_ids), STATUS_BATCH_SIZE):
+            batch = application_ids[start:start + STATUS_BATCH_SIZE]
+            where = f"id IN ({', '.join(['%s'] * len(batch))}) AND status <> %s"
+            record_events(cursor, 'status_changed', where, (*batch, status), status)
+            record_status_change(cursor, where, (*batch, status), status, changed_at)
+            cursor.execute(f"UPDATE applications SET status = %s WHERE {where}", (status, *batch, status))
+            changed += cursor.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return changed
+
+
+def update_status_by_filter(conn, job_id, status, **filters):
+    """Sets the status of every applicant of a job matching ``filters`` in one
+    UPDATE, then commits. Returns the rows changed.
+    """
+    if status not in APPLICATION_STATUSES:
+        raise ValueError(f"Unknown application status {status!r}.")
+    where, params = _applicant_filter(job_id, **filters)
+    where, params = f"{where} AND status <> %s", (*params, status)
+    cursor = conn.cursor()
+    try:
+        changed_at = database_now(cursor)
+        record_events(cursor, 'status_changed', where, params, status)
+        record_status_change(cursor, where, params, status, changed_at)
+        cursor.execute(f"UPDATE applications SET status = %s WHERE {where}", (status, *params))
+        changed = cursor.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return changed
+
+
+def get_application(conn, application_id):
+    """Returns one application, or None.
+
+    The resume itself stays in the resume store; fetch it with
+    resume_store.load_resume_text() only when it is actually opened.
+    """
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("""
+        SELECT id AS application_id, job_id, name, email, phone, gender, nationality,
+               status, parse_status, parse_error, skill_score, resume_id
+        FROM applications WHERE id = %s
+    """, (application_id,))
+    application = cursor.fetchone()
+    cursor.close()
+    return application
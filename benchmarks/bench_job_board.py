@@ -0,0 +1,79 @@
+"""Micro-benchmark for job board render preparation.
+
+Compares the old per-card pandas lookups (iterrows plus a scan of the
+applicant's applications for every card) with the dict-based status map
+and plain-tuple iteration the board uses now. No database or Streamlit
+session is needed; only the work done between fetching rows and drawing
+cards is timed.
+
+    python benchmarks/bench_job_board.py --jobs 10000 --applications 500
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+STATUSES = ['Pending', 'In Review', 'Interview', 'Rejected', 'Hired']
+
+
+def make_data(n_jobs, n_applications, seed=0):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    jobs = [(job_id, f"Company {job_id % 997}", f"Role {job_id % 131}", start + timedelta(minutes=job_id))
+            for job_id in range(1, n_jobs + 1)]
+    applied = rng.sample(range(1, n_jobs + 1), n_applications)
+    applications = [(job_id, rng.choice(STATUSES)) for job_id in applied]
+    return jobs, applications
+
+
+def prepare_before(jobs, applications):
+    """The original board: iterrows and two pandas scans per card."""
+    jobs_df = pd.DataFrame(jobs, columns=['id', 'company', 'job_role', 'created_at'])
+    applied_jobs_df = pd.DataFrame(applications, columns=['job_id', 'status'])
+    cards = []
+    for _, row in jobs_df.iterrows():
+        status = None
+        if row['id'] in applied_jobs_df['job_id'].values:
+            status = applied_jobs_df.loc[applied_jobs_df['job_id'] == row['id'], 'status'].iloc[0]
+        cards.append((row['id'], row['company'], row['job_role'], status))
+    return cards
+
+
+def prepare_after(jobs, applications):
+    """The current board: one status dict, plain tuple iteration."""
+    statuses = dict(applications)
+    return [(job_id, company, job_role, statuses.get(job_id))
+            for job_id, company, job_role, _created_at in jobs]
+
+
+def best_of(fn, repeat, *args):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=10_000)
+    parser.add_argument('--applications', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    jobs, applications = make_data(args.jobs, args.applications)
+    before, cards_before = best_of(prepare_before, args.repeat, jobs, applications)
+    after, cards_after = best_of(prepare_after, args.repeat, jobs, applications)
+    assert cards_before == cards_after, "both strategies must produce the same cards"
+
+    print(f"{args.jobs} jobs x {args.applications} applications")
+    print(f"  before (iterrows + pandas lookups): {before * 1000:9.1f} ms")
+    print(f"  after  (status dict + tuples):      {after * 1000:9.1f} ms")
+    print(f"  speed-up: {before / after:.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,311 @@
+"""Load test: many concurrent applicant, recruiter and admin sessions.
+
+Seeds a synthetic SQLite database (see seed.py), then drives the real
+app.py headlessly with Streamlit's AppTest from concurrent workers, all
+reading and writing the same database: applicants apply to a job and
+withdraw again, recruiters change an applicant's status. AppTest swaps
+process-wide globals while a script runs, so it can drive only one session
+at a time per process; each worker is therefore its own process, like one
+app instance serving a stream of users. Every rerun is timed and its queries are counted from the
+profile instrumentation.py leaves in session state; a write that ends in
+st.rerun() counts the queries of the page it lands on. Reports p50/p95/p99
+page latency and mean queries per rerun for each page, plus the largest
+peak RSS of any worker.
+
+    python benchmarks/load_test.py --workers 8 --sessions 4
+    python benchmarks/load_test.py --check benchmarks/load_baseline.json
+
+With --check the run fails (exit status 1) when a metric is worse than the
+baseline by more than its tolerance in THRESHOLDS, or when any page raised
+an error. --write-baseline records the current run as the new baseline;
+baselines are only comparable on the same machine and scale. The report
+goes to stdout; Streamlit's own log lines go to stderr.
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from collections import defaultdict
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from seed import FIRST_NAMES, NATIONALITIES, make_resume_lines, seed_database  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app.py')
+RERUN_TIMEOUT = 120.0  # seconds one rerun may take before AppTest gives up
+# Share of sessions per role; applicants far outnumber recruiters and admins.
+# Every role still gets MIN_TRACKED_RERUNS sessions, so all of its pages are gated.
+ROLE_MIX = {'recruiter': 0.25, 'admin': 0.05}  # the rest are applicants
+# Allowed regression per metric kind, as a fraction of the baseline value.
+# Query counts vary a little with which cached pages a session happens to hit.
+THRESHOLDS = {'p95_ms': 0.5, 'queries': 0.1, 'rss_mb': 0.25}
+# Absolute allowance under the fraction: on a one-query page, a single cache
+# entry expiring mid-run moves the mean by more than 10%. An extra query on
+# every rerun still adds a whole query to the mean and fails.
+MIN_SLACK = {'queries': 0.25}
+MIN_TRACKED_RERUNS = 5  # pages with fewer samples are reported but too noisy to fail a build on
+SEARCH_QUERIES = ['python', 'sql aws', 'kubernetes docker', 'machine learning pandas', 'react typescript']
+
+
+def _by_label(widgets, label):
+    return next(widget for widget in widgets if widget.label == label)
+
+
+def _click(at, label):
+    _by_label(at.button, label).click()
+
+
+def _apply(at, rng):
+    name = f"{rng.choice(FIRST_NAMES)} Loadtest"
+    resume = "\n".join(make_resume_lines(rng, name)).encode('utf-8')
+    for label, value in (("Full Name", name), ("Email", f"{name.replace(' ', '.').lower()}@example.com"),
+                         ("Phone Number", f"+1555{rng.randint(1000000, 9999999)}"),
+                         ("Nationality", rng.choice(NATIONALITIES))):
+        _by_label(at.text_input, label).input(value)
+    at.file_uploader[0].set_value(("resume.txt", resume, "text/plain"))
+    _click(at, "Submit Application")
+    at.run()
+
+
+def applicant_session(at, rng, dataset):
+    """The job board and its next page, then one job.
+
+    Opens the job's details, applies to it and withdraws again.
+    """
+    at.session_state['user_id'] = rng.choice(dataset['applicant_ids'])
+    yield 'board', at.run
+    yield 'board_next_page', lambda: (_click(at, "Older Jobs →"), at.run())
+    job_key = rng.choice([button.key for button in at.button if button.key and button.key.startswith('view_')])
+    yield 'job_details', lambda: (at.button(key=job_key).click(), at.run())
+    if any(button.label == "Withdraw Application" for button in at.button):
+        return  # already applied to this job; rare at the default scale
+    yield 'apply', lambda: _apply(at, rng)
+    yield 'applied_details', lambda: (at.button(key=job_key).click(), at.run())
+    yield 'withdraw', lambda: (_click(at, "Withdraw Application"), at.run())
+
+
+def recruiter_session(at, rng, dataset):
+    """A popular job's applicants, ranked, then one status change.
+
+    Covers the applicant charts and a ranked search of the applicants.
+    """
+    job_id, recruiter_id = rng.choice(dataset['popular_jobs'])
+    at.session_state['user_id'] = recruiter_id
+    at.session_state['applicants_seen_after'] = 0  # as the login form sets it on a first visit
+    yield 'postings', at.run
+    yield 'applicants', lambda: (at.number_input(key='rec_job_id').set_value(job_id), _click(at, "View Applicants"),
+                                 at.run())
+    yield 'ranked_search', lambda: (at.text_input(key=f'rank_query_{job_id}').input(rng.choice(SEARCH_QUERIES)),
+                                    at.run())
+    status = _by_label(at.selectbox, "Update Status:")
+    yield 'update_status', lambda: (status.set_value(rng.choice([option for option in status.options
+                                                                 if option != status.value])),
+                                    _click(at, "Update Status"), at.run())
+
+
+def admin_session(at, rng, dataset):
+    """The admin dashboard, twice: cold and with its counts cached."""
+    at.session_state['user_id'] = dataset['admin_id']
+    yield 'dashboard', at.run
+    yield 'dashboard_again', at.run
+
+
+SCENARIOS = {'applicant': applicant_session, 'recruiter': recruiter_session, 'admin': admin_session}
+
+
+def run_session(role, rng, dataset, secrets, samples, errors):
+    """Logs one user in and plays their scenario, recording a sample per page."""
+    at = AppTest.from_file(APP_PATH, default_timeout=RERUN_TIMEOUT)
+    for key, value in secrets.items():
+        at.secrets[key] = value
+    at.session_state['logged_in'] = True
+    at.session_state['user_role'] = role
+    for page, step in SCENARIOS[role](at, rng, dataset):
+        name = f"{role}.{page}"
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception as err:  # a broken page must not stop the other sessions
+            errors.append(f"{name}: {type(err).__name__}: {err}")
+            return
+        elapsed = time.perf_counter() - started
+        failures = [element.value for element in (*at.exception, *at.error)]
+        if failures:
+            errors.append(f"{name}: {failures[0]}")
+            return
+        profile = at.session_state['last_rerun_profile'] if 'last_rerun_profile' in at.session_state else None
+        samples[name].append((elapsed, len(profile['queries']) if profile else 0))
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def peak_rss_mb():
+    """The process's peak resident set size so far, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_worker(sessions, dataset, secrets, seed, warmup=True):
+    """Plays ``sessions`` of (role, seed) one after another in this process.
+
+    Returns (samples, errors, seconds spent on the sessions, peak RSS in MB);
+    samples map each page onto (seconds, queries) pairs.
+    """
+    samples = defaultdict(list)
+    errors = []
+    if warmup:
+        # Pays for bootstrap (pool, migrations, caches) outside the measurements.
+        for role in SCENARIOS:
+            run_session(role, random.Random(seed), dataset, secrets, defaultdict(list), errors)
+    started = time.perf_counter()
+    for role, session_seed in sessions:
+        run_session(role, random.Random(session_seed), dataset, secrets, samples, errors)
+    return dict(samples), errors, time.perf_counter() - started, peak_rss_mb()
+
+
+def run_load_test(db_path, workers=8, sessions=4, seed=0, pool_size=10, warmup=True, **scale):
+    """Seeds ``db_path``, runs ``workers`` x ``sessions`` sessions and returns the report."""
+    dataset = seed_database(db_path, seed=seed, **scale)
+    secrets = {'DB_BACKEND': 'sqlite', 'DB_PATH': db_path, 'DB_POOL_SIZE': pool_size}
+    rng = random.Random(seed)
+    total = workers * sessions
+    roles = [role for role, share in ROLE_MIX.items()
+             for _ in range(max(MIN_TRACKED_RERUNS, round(share * total)))]
+    roles += ['applicant'] * max(1, total - len(roles))
+    rng.shuffle(roles)
+    plan = [(role, rng.random()) for role in roles]
+    samples = defaultdict(list)
+    errors = []
+    elapsed = peak_rss = 0.0
+
+    # Workers start from a clean interpreter rather than a copy of this one.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        # Each worker warms up as a different user; identical warmups would apply to the same job at once.
+        futures = [executor.submit(run_worker, plan[number::workers], dataset, secrets, rng.random(), warmup)
+                   for number in range(workers)]
+        for future in futures:
+            worker_samples, worker_errors, worker_seconds, worker_rss = future.result()
+            for name, values in worker_samples.items():
+                samples[name].extend(values)
+            errors.extend(worker_errors)
+            elapsed = max(elapsed, worker_seconds)
+            peak_rss = max(peak_rss, worker_rss)
+
+    pages = {}
+    for name, values in sorted(samples.items()):
+        latencies = sorted(seconds * 1000 for seconds, _ in values)
+        pages[name] = {
+            'reruns': len(values),
+            'p50_ms': _percentile(latencies, 0.50),
+            'p95_ms': _percentile(latencies, 0.95),
+            'p99_ms': _percentile(latencies, 0.99),
+            'queries': sum(queries for _, queries in values) / len(values),
+        }
+    reruns = sum(page['reruns'] for page in pages.values())
+    return {
+        'scale': {'workers': workers, 'sessions': sessions, 'seed': seed, **scale},
+        'seconds': elapsed,
+        'reruns_per_second': reruns / elapsed if elapsed else 0.0,
+        'peak_rss_mb': peak_rss,
+        'pages': pages,
+        'errors': errors,
+    }
+
+
+def tracked_metrics(report):
+    """The metrics compared against a baseline, as {name: value}."""
+    metrics = {'peak.rss_mb': report['peak_rss_mb']}
+    for name, page in report['pages'].items():
+        if page['reruns'] >= MIN_TRACKED_RERUNS:
+            metrics[f"{name}.p95_ms"] = page['p95_ms']
+            metrics[f"{name}.queries"] = page['queries']
+    return metrics
+
+
+def regressions(report, baseline):
+    """Describes every tracked metric that is worse than ``baseline`` allows."""
+    found = [f"{error}" for error in report['errors']]
+    if baseline['scale'] != report['scale']:
+        found.append(f"baseline was recorded at scale {baseline['scale']}, this run is {report['scale']}")
+        return found
+    current = tracked_metrics(report)
+    for name, expected in baseline['metrics'].items():
+        if name not in current:
+            found.append(f"{name}: not measured in this run")
+            continue
+        kind = name.rsplit('.', 1)[1]
+        allowed = max(expected * (1 + THRESHOLDS[kind]), expected + MIN_SLACK.get(kind, 0))
+        if current[name] > allowed + 1e-9:
+            found.append(f"{name}: {current[name]:.2f} exceeds {allowed:.2f} (baseline {expected:.2f})")
+    return found
+
+
+def print_report(report):
+    scale = report['scale']
+    print(f"{scale['workers']} workers x {scale['sessions']} sessions: "
+          f"{report['reruns_per_second']:.1f} reruns/s over {report['seconds']:.1f}s, "
+          f"peak worker RSS {report['peak_rss_mb']:.0f} MB")
+    print(f"  {'page':<32}{'reruns':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}")
+    for name, page in report['pages'].items():
+        print(f"  {name:<32}{page['reruns']:>7}{page['p50_ms']:>9.0f}{page['p95_ms']:>9.0f}"
+              f"{page['p99_ms']:>9.0f}{page['queries']:>9.1f}")
+    for error in report['errors']:
+        print(f"  error: {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=8, help="concurrent sessions")
+    parser.add_argument('--sessions', type=int, default=4, help="sessions each worker runs, one after another")
+    parser.add_argument('--recruiters', type=int, default=20)
+    parser.add_argument('--jobs', type=int, default=500)
+    parser.add_argument('--applicants', type=int, default=1000)
+    parser.add_argument('--applications', type=int, default=5000)
+    parser.add_argument('--pdf-share', type=float, default=0.3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--pool-size', type=int, default=10)
+    parser.add_argument('--db', help="SQLite file to seed (default: a temporary file)")
+    parser.add_argument('--json', help="also write the report to this file")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--check', metavar='BASELINE', help="fail if a metric regressed past this baseline")
+    group.add_argument('--write-baseline', metavar='BASELINE', help="record this run as the baseline")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        report = run_load_test(args.db or os.path.join(scratch, 'load_test.db'), args.workers, args.sessions,
+                               args.seed, args.pool_size, recruiters=args.recruiters, jobs=args.jobs,
+                               applicants=args.applicants, applications=args.applications,
+                               pdf_share=args.pdf_share)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as out:
+            json.dump(report, out, indent=2)
+    if args.write_baseline:
+        if report['errors']:
+            sys.exit("Not writing a baseline from a run with errors.")
+        with open(args.write_baseline, 'w') as out:
+            json.dump({'scale': report['scale'], 'metrics': tracked_metrics(report)}, out, indent=2, sort_keys=True)
+            out.write("\n")
+        print(f"Wrote baseline to {args.write_baseline}.")
+    elif args.check:
+        with open(args.check) as baseline_file:
+            found = regressions(report, json.load(baseline_file))
+        if found:
+            print("Regressions:")
+            for regression in found:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("No regressions.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""Synthetic dataset for benchmarks and load tests.
+
+Builds an embedded SQLite database (see sqlite_backend.py) with recruiters,
+applicants, jobs and applications whose resumes look like real ones: a few
+paragraphs of experience mentioning skills from the job postings, stored as
+plain text or as a one-page PDF. The same arguments and seed always produce
+the same data, so timings taken on different machines compare like for like.
+
+    python benchmarks/seed.py bench.db --jobs 2000 --applications 20000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import sqlite_backend  # noqa: E402
+from applications import APPLICATION_STATUSES, insert_applications  # noqa: E402
+from jobs import insert_jobs  # noqa: E402
+from migrations import apply_migrations  # noqa: E402
+from resume_store import store_resume  # noqa: E402
+from users import hash_password  # noqa: E402
+
+BENCH_PASSWORD = 'bench'
+BATCH_SIZE = 1000
+
+SKILLS = ['python', 'sql', 'java', 'javascript', 'typescript', 'react', 'node.js', 'go', 'aws', 'gcp',
+          'docker', 'kubernetes', 'postgresql', 'mysql', 'spark', 'machine learning', 'pandas', 'c++',
+          'c#', 'terraform', 'linux', 'excel', 'tableau', 'figma', 'scrum', 'salesforce']
+ROLES = ['Backend Engineer', 'Data Analyst', 'Frontend Developer', 'DevOps Engineer', 'Data Scientist',
+         'QA Engineer', 'Product Designer', 'Site Reliability Engineer', 'Business Analyst', 'Mobile Developer']
+COMPANIES = ['Acme', 'Globex', 'Initech', 'Umbrella', 'Hooli', 'Stark Industries', 'Wayne Enterprises',
+             'Cyberdyne', 'Soylent', 'Vandelay Industries', 'Tyrell', 'Wonka', 'Oscorp', 'Aperture']
+FIRST_NAMES = ['Aarav', 'Maya', 'Liam', 'Sofia', 'Noah', 'Chen', 'Amara', 'Mateo', 'Priya', 'Kofi', 'Elena', 'Yuki']
+LAST_NAMES = ['Sharma', 'Garcia', 'Smith', 'Okafor', 'Nguyen', 'Kowalski', 'Haddad', 'Silva', 'Tanaka', 'Brown']
+GENDERS = ['Female', 'Male', 'Other']
+NATIONALITIES = ['Indian', 'American', 'British', 'Nigerian', 'Brazilian', 'German', 'Japanese', 'Canadian']
+
+
+def make_pdf(lines):
+    """A minimal one-page PDF showing ``lines`` of text, readable by PyPDF2."""
+    escaped = [line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)') for line in lines]
+    stream = "BT /F1 10 Tf 12 TL 50 780 Td " + " ".join(f"({line}) Tj T*" for line in escaped) + " ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        "/Resources << /Font << /F1 5 0 R >> >> >>",
+        f"<< /Length {len(stream.encode('latin-1'))} >>\nstream\n{stream}\nendstream",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode('latin-1')
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode('latin-1')
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode('latin-1')
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode('latin-1')
+    return bytes(out)
+
+
+def make_resume_lines(rng, name):
+    """A resume of 10-30 lines: a summary, a skills list and past roles."""
+    skills = rng.sample(SKILLS, rng.randint(3, 8))
+    lines = [name, f"Summary: {rng.randint(1, 15)} years building products with {', '.join(skills[:3])}.",
+             f"Skills: {', '.join(skills)}"]
+    for _ in range(rng.randint(2, 6)):
+        start = rng.randint(2005, 2022)
+        lines.append(f"{rng.choice(ROLES)} at {rng.choice(COMPANIES)}, {start} - {start + rng.randint(1, 4)}")
+        for _ in range(rng.randint(1, 4)):
+            lines.append(f"- Delivered {rng.choice(['a', 'the'])} {rng.choice(['billing', 'search', 'reporting', 'onboarding'])} "
+                         f"{rng.choice(['service', 'pipeline', 'dashboard', 'platform'])} using {rng.choice(skills)} "
+                         f"for {rng.randint(2, 900)}k users.")
+    return lines
+
+
+def _insert_users(conn, role, usernames):
+    cursor = conn.cursor()
+    cursor.executemany("INSERT INTO users (username, password_hash, role) VALUES (%s, %s, %s)",
+                       [(username, hash_password(BENCH_PASSWORD), role) for username in usernames])
+    cursor.execute("SELECT username, id FROM users WHERE role = %s", (role,))
+    ids = dict(cursor.fetchall())
+    cursor.close()
+    conn.commit()
+    return [ids[username] for username in usernames]
+
+
+def seed_database(path, recruiters=20, jobs=500, applicants=1000, applications=5000, pdf_share=0.3, seed=0):
+    """Creates a benchmark database at ``path``, replacing any existing file.
+
+    Every user's password is BENCH_PASSWORD; there is one admin, 'admin'.
+    Applications favour a few popular jobs, as real traffic does. Returns
+    the IDs the load test logs in as and visits.
+    """
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    rng = random.Random(seed)
+    conn = sqlite_backend.connect(path)
+    try:
+        apply_migrations(conn)
+        admin_ids = _insert_users(conn, 'admin', ['admin'])
+        recruiter_ids = _insert_users(conn, 'recruiter', [f"recruiter{i}" for i in range(recruiters)])
+        applicant_ids = _insert_users(conn, 'applicant', [f"applicant{i}" for i in range(applicants)])
+
+        for start in range(0, jobs, BATCH_SIZE):
+            insert_jobs(conn, [{
+                'recruiter_id': recruiter_ids[number % recruiters],
+                'external_ref': f"bench-{number}",
+                'company': rng.choice(COMPANIES),
+                'job_role': rng.choice(ROLES),
+                'job_description': f"We are hiring. {' '.join(rng.choice(SKILLS) for _ in range(30))}",
+                'skills_required': ', '.join(rng.sample(SKILLS, rng.randint(2, 6))),
+                'salary': f"${rng.randint(40, 200)}k",
+            } for number in range(start, min(start + BATCH_SIZE, jobs))])
+            conn.commit()
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, recruiter_id FROM jobs ORDER BY id")
+        job_owners = cursor.fetchall()
+        job_ids = [job_id for job_id, _ in job_owners]
+        cursor.close()
+
+        # Zipf-like popularity: the k-th job gets about 1/k of the top job's applications.
+        weights = [1 / rank for rank in range(1, len(job_ids) + 1)]
+        wanted = min(applications, len(job_ids) * len(applicant_ids))
+        pairs = set()
+        while len(pairs) < wanted:
+            pairs.add((rng.choices(job_ids, weights)[0], rng.choice(applicant_ids)))
+        pairs = sorted(pairs)
+        for start in range(0, len(pairs), BATCH_SIZE):
+            batch = []
+            for job_id, applicant_id in pairs[start:start + BATCH_SIZE]:
+                name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+                lines = make_resume_lines(rng, name)
+                text = "\n".join(lines)
+                if rng.random() < pdf_share:
+                    resume = store_resume(conn, make_pdf(lines), f"{applicant_id}-{job_id}.pdf", text=text)
+                else:
+                    resume = store_resume(conn, text.encode('utf-8'), f"{applicant_id}-{job_id}.txt", text=text)
+                batch.append({
+                    'job_id': job_id, 'applicant_id': applicant_id, 'name': name,
+                    'email': f"{name.replace(' ', '.').lower()}.{applicant_id}@example.com",
+                    'phone': f"+1555{rng.randint(1000000, 9999999)}", 'gender': rng.choice(GENDERS),
+                    'nationality': rng.choice(NATIONALITIES), 'status': rng.choice(APPLICATION_STATUSES),
+                    'resume_id': resume['id'],
+                })
+            insert_applications(conn, batch)
+            conn.commit()
+    finally:
+        conn.close()
+    return {
+        'admin_id': admin_ids[0],
+        'recruiter_ids': recruiter_ids,
+        'applicant_ids': applicant_ids,
+        # The most applied-to jobs and their recruiters, for the recruiter views.
+        'popular_jobs': job_owners[:10],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', help="SQLite file to create")
+    parser.add_argument('--recruiters', type=int, default=20)
+    parser.add_argument('--jobs', type=int, default=500)
+    parser.add_argument('--applicants', type=int, default=1000)
+    parser.add_argument('--applications', type=int, default=5000)
+    parser.add_argument('--pdf-share', type=float, default=0.3, help="fraction of resumes stored as PDFs")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    seed_database(args.path, args.recruiters, args.jobs, args.applicants, args.applications, args.pdf_share, args.seed)
+    print(f"Seeded {args.path} in {time.perf_counter() - started:.1f}s.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""One-time startup work for an app process.
+
+Creating the connection pool, bringing the schema up to date and warming the
+job board cache happen once per process rather than on every Streamlit
+rerun. Run ``python bootstrap.py`` before starting the server to pay the
+migration cost up front and see how long a cold start takes.
+"""
+import logging
+import sys
+import time
+from datetime import datetime
+
+import streamlit as st
+
+from analytics import get_reconciler
+from db import get_pool
+from jobs import load_job_page
+from migrations import apply_migrations
+from resume_parser import get_resume_parser
+
+logger = logging.getLogger(__name__)
+
+
+def bootstrap():
+    """Runs every startup step and returns a report of how long each took."""
+    steps = {}
+    started = time.perf_counter()
+
+    def timed(name, fn):
+        step_started = time.perf_counter()
+        result = fn()
+        steps[name] = time.perf_counter() - step_started
+        return result
+
+    pool = timed('connection_pool', get_pool)
+
+    def migrate():
+        with pool.connection() as conn:
+            return apply_migrations(conn)
+
+    applied = timed('migrations', migrate)
+    timed('job_board_cache', load_job_page)
+    timed('resume_parser', get_resume_parser)
+    timed('analytics_reconciler', get_reconciler)
+
+    report = {
+        'finished_at': datetime.now(),
+        'total_seconds': time.perf_counter() - started,
+        'step_seconds': steps,
+        'migrations_applied': applied,
+    }
+    logger.info("Bootstrap finished in %.3fs (%s); applied migrations: %s",
+                report['total_seconds'], ", ".join(f"{name}={seconds:.3f}s" for name, seconds in steps.items()),
+                applied or "none")
+    return report
+
+
+@st.cache_resource(show_spinner="Starting up...")
+def ensure_bootstrapped():
+    """bootstrap(), run once per process. A failed attempt is retried on the next rerun."""
+    return bootstrap()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    try:
+        report = bootstrap()
+    except Exception:
+        logger.exception("Bootstrap failed")
+        sys.exit(1)
+    for name, seconds in report['step_seconds'].items():
+        print(f"{name:<16} {seconds * 1000:8.1f} ms")
+    print(f"{'total':<16} {report['total_seconds'] * 1000:8.1f} ms")
@@ -0,0 +1,367 @@
+"""Bulk import of jobs and applications from CSV or JSONL files.
+
+Records are read one at a time, validated, and written in batches with
+executemany, one transaction per batch. After every committed batch the
+number of records consumed is saved to a checkpoint file, so an interrupted
+import picks up where it stopped. Rows that were already imported are
+skipped (jobs by their ``ref``, applications by job and applicant), so
+re-running a whole file is also safe.
+
+Job records: ref, recruiter, company, job_role, job_description,
+skills_required, salary. Application records: job_ref, applicant, name,
+email, phone, gender, nationality, status, and either resume_text or a
+resume_path relative to the input file. Resume files in a batch are parsed
+in parallel in a process pool; identical files are stored and parsed once.
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from applications import APPLICATION_STATUSES, complete_resume_parse, fail_resume_parse, insert_applications
+from jobs import insert_jobs, job_ids_by_ref
+from resume_parser import MAX_RESUME_BYTES, MAX_RESUME_PAGES, PARSE_TIMEOUT, TIMEOUT_GRACE, decode_text, parse_in_worker
+from resume_store import content_hash, find_resume, retry_resume, store_resume
+
+DEFAULT_BATCH_SIZE = 1000
+IMPORT_FORMATS = ('csv', 'jsonl')
+MAX_REPORTED_REJECTS = 1000
+# Matches no SHA-256 hex digest, so applicants created by an import cannot log in.
+IMPORTED_PASSWORD_HASH = '!'
+
+# field: (required, maximum length)
+IMPORT_FIELDS = {
+    'jobs': {
+        'ref': (True, 100),
+        'recruiter': (False, 255),
+        'company': (True, 255),
+        'job_role': (True, 255),
+        'job_description': (True, None),
+        'skills_required': (False, None),
+        'salary': (False, 255),
+    },
+    'applications': {
+        'job_ref': (True, 100),
+        'applicant': (True, 255),
+        'name': (True, 255),
+        'email': (True, 255),
+        'phone': (False, 20),
+        'gender': (False, 50),
+        'nationality': (False, 100),
+        'status': (False, None),
+        'resume_text': (False, None),
+        'resume_path': (False, None),
+    },
+}
+
+
+class InvalidRecord(ValueError):
+    """Raised for a record that cannot be imported; the record is skipped."""
+
+
+def read_records(stream, fmt):
+    """Yields (record number, dict or None, error or None) for each record in ``stream``."""
+    if fmt == 'csv':
+        for number, record in enumerate(csv.DictReader(stream), start=1):
+            yield number, record, None
+        return
+    number = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            record = json.loads(line)
+        except ValueError as err:
+            yield number, None, f"Invalid JSON: {err}"
+            continue
+        if not isinstance(record, dict):
+            yield number, None, "Each line must be a JSON object."
+            continue
+        yield number, record, None
+
+
+def validate(kind, record, default_recruiter=None):
+    """Returns a cleaned copy of ``record``; raises InvalidRecord if it cannot be imported."""
+    cleaned = {}
+    for field, (required, max_length) in IMPORT_FIELDS[kind].items():
+        value = record.get(field)
+        value = str(value).strip() if value is not None else ""
+        if required and not value:
+            raise InvalidRecord(f"Missing {field}.")
+        if max_length and len(value) > max_length:
+            raise InvalidRecord(f"{field} is longer than {max_length} characters.")
+        cleaned[field] = value or None
+    if kind == 'jobs':
+        cleaned['recruiter'] = cleaned['recruiter'] or default_recruiter
+        if not cleaned['recruiter']:
+            raise InvalidRecord("Missing recruiter.")
+    else:
+        cleaned['status'] = cleaned['status'] or 'Pending'
+        if cleaned['status'] not in APPLICATION_STATUSES:
+            raise InvalidRecord(f"Unknown status {cleaned['status']!r}.")
+        if not cleaned['resume_text'] and not cleaned['resume_path']:
+            raise InvalidRecord("Missing resume_text or resume_path.")
+    return cleaned
+
+
+def _user_ids(conn, usernames, role):
+    """Maps each of ``usernames`` that belongs to a user with ``role`` onto its ID."""
+    if not usernames:
+        return {}
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT username, id FROM users WHERE role = %s AND username IN ({', '.join(['%s'] * len(usernames))})",
+                   (role, *usernames))
+    ids = dict(cursor.fetchall())
+    cursor.close()
+    return ids
+
+
+def _ensure_applicants(conn, usernames):
+    """Like _user_ids() for applicants, creating login-less accounts for unknown usernames."""
+    usernames = list(set(usernames))
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT username FROM users WHERE username IN ({', '.join(['%s'] * len(usernames))})",
+                   tuple(usernames))
+    known = {row[0] for row in cursor.fetchall()}
+    missing = [username for username in usernames if username not in known]
+    if missing:
+        cursor.executemany("INSERT IGNORE INTO users (username, password_hash, role) VALUES (%s, %s, 'applicant')",
+                           [(username, IMPORTED_PASSWORD_HASH) for username in missing])
+    cursor.close()
+    return _user_ids(conn, usernames, 'applicant')
+
+
+def _store_resumes(conn, records, base_dir, processes):
+    """Stores the resume of every record and returns {record number: resume_id}.
+
+    Raises nothing for a bad file; its record number is mapped to an error
+    string instead. Files not seen before are parsed in ``processes``.
+    """
+    resume_ids, uploads = {}, {}
+    for number, record in records:
+        if record['resume_text']:
+            data, filename, text = record['resume_text'].encode('utf-8'), 'resume.txt', record['resume_text']
+        elif base_dir is None:
+            resume_ids[number] = "resume_path can only be imported from the command line."
+            continue
+        else:
+            path = os.path.join(base_dir, record['resume_path'])
+            try:
+                if os.path.getsize(path) > MAX_RESUME_BYTES:
+                    resume_ids[number] = f"{record['resume_path']} is larger than {MAX_RESUME_BYTES // (1024 * 1024)} MB."
+                    continue
+                with open(path, 'rb') as resume_file:
+                    data = resume_file.read()
+            except OSError as err:
+                resume_ids[number] = f"Cannot read {record['resume_path']}: {err.strerror}."
+                continue
+            filename = os.path.basename(path)
+            text = decode_text(data) if filename.lower().endswith('.txt') else None
+        digest = content_hash(data)
+        uploads.setdefault(digest, {'data': data, 'filename': filename, 'text': text, 'numbers': []})
+        uploads[digest]['numbers'].append(number)
+
+    # Identical files already stored and parsed are reused as they are.
+    to_parse = {}
+    for digest, upload in uploads.items():
+        existing = find_resume(conn, digest)
+        if existing and existing['parse_status'] == 'done':
+            upload['id'] = existing['id']
+        elif upload['text'] is None:
+            to_parse[digest] = processes.submit(parse_in_worker, upload['data'], upload['filename'],
+                                                MAX_RESUME_PAGES, PARSE_TIMEOUT)
+
+    for digest, upload in uploads.items():
+        if 'id' not in upload:
+            error = None
+            if digest in to_parse:
+                try:
+                    upload['text'], _ = to_parse[digest].result(timeout=PARSE_TIMEOUT + TIMEOUT_GRACE)
+                except Exception as err:
+                    error = f"Could not read resume: {err}"
+            # Committed with the batch's applications, so a failed batch leaves no orphaned resumes.
+            resume = store_resume(conn, upload['data'], upload['filename'], text=upload['text'], commit=False)
+            if resume['parse_status'] != 'done':
+                retry_resume(conn, resume['id'], commit=False)
+                if error:
+                    fail_resume_parse(conn, resume['id'], error, commit=False)
+                else:
+                    complete_resume_parse(conn, resume['id'], upload['text'], commit=False)
+            upload['id'] = resume['id']
+        for number in upload['numbers']:
+            resume_ids[number] = upload['id']
+    return resume_ids
+
+
+def _import_jobs(conn, batch, reject):
+    recruiter_ids = _user_ids(conn, list({record['recruiter'] for _, record in batch}), 'recruiter')
+    jobs = []
+    for number, record in batch:
+        if record['recruiter'] not in recruiter_ids:
+            reject(number, f"Unknown recruiter {record['recruiter']!r}.")
+            continue
+        jobs.append({
+            'recruiter_id': recruiter_ids[record['recruiter']],
+            'external_ref': record['ref'],
+            'company': record['company'],
+            'job_role': record['job_role'],
+            'job_description': record['job_description'],
+            'skills_required': record['skills_required'],
+            'salary': record['salary'],
+        })
+    return insert_jobs(conn, jobs), len(jobs)
+
+
+def _import_applications(conn, batch, reject, base_dir, processes):
+    job_ids = job_ids_by_ref(conn, list({record['job_ref'] for _, record in batch}))
+    known = []
+    for number, record in batch:
+        if record['job_ref'] in job_ids:
+            known.append((number, record))
+        else:
+            reject(number, f"Unknown job_ref {record['job_ref']!r}.")
+    if not known:
+        return 0, 0
+    resume_ids = _store_resumes(conn, known, base_dir, processes)
+    applicant_ids = _ensure_applicants(conn, [record['applicant'] for _, record in known])
+    applications = []
+    for number, record in known:
+        if isinstance(resume_ids[number], str):
+            reject(number, resume_ids[number])
+            continue
+        if record['applicant'] not in applicant_ids:
+            reject(number, f"{record['applicant']!r} is not an applicant.")
+            continue
+        applications.append({
+            'job_id': job_ids[record['job_ref']],
+            'applicant_id': applicant_ids[record['applicant']],
+            'name': record['name'],
+            'email': record['email'],
+            'phone': record['phone'],
+            'gender': record['gender'],
+            'nationality': record['nationality'],
+            'status': record['status'],
+            'resume_id': resume_ids[number],
+        })
+    return insert_applications(conn, applications), len(applications)
+
+
+def _load_checkpoint(path, kind, source):
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as checkpoint_file:
+        checkpoint = json.load(checkpoint_file)
+    if (checkpoint['kind'], checkpoint['source']) != (kind, source):
+        raise ValueError(f"{path} is a checkpoint for importing {checkpoint['kind']} from {checkpoint['source']}.")
+    return checkpoint
+
+
+def _save_checkpoint(path, stats):
+    temporary = f"{path}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as checkpoint_file:
+        json.dump({key: value for key, value in stats.items() if key != 'rejects'}, checkpoint_file)
+    os.replace(temporary, path)
+
+
+def run_import(conn, kind, stream, fmt, source=None, batch_size=DEFAULT_BATCH_SIZE, checkpoint_path=None,
+               base_dir=None, default_recruiter=None, workers=None, on_progress=None):
+    """Imports every record of ``stream`` and returns the import's statistics.
+
+    ``source`` names the input in the checkpoint, which is resumed from if
+    it exists and removed once the import finishes. ``on_progress(stats)`` is
+    called after every committed batch. A batch that fails is rolled back and
+    the error propagates; its records are retried when the import is resumed.
+    """
+    if kind not in IMPORT_FIELDS:
+        raise ValueError(f"Cannot import {kind!r}.")
+    checkpoint = _load_checkpoint(checkpoint_path, kind, source)
+    stats = {'kind': kind, 'source': source, 'records': 0, 'inserted': 0, 'skipped': 0, 'rejected': 0, 'rejects': []}
+    if checkpoint:
+        stats.update(checkpoint, rejects=[])
+    resume_from = stats['records']
+
+    def reject(number, reason):
+        stats['rejected'] += 1
+        if len(stats['rejects']) < MAX_REPORTED_REJECTS:
+            stats['rejects'].append((number, reason))
+
+    # Only resume files need parsing, and they can only be read given a base_dir.
+    processes = None
+    if kind == 'applications' and base_dir is not None:
+        processes = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+    def flush(batch, last_number):
+        try:
+            if kind == 'jobs':
+                inserted, valid = _import_jobs(conn, batch, reject)
+            else:
+                inserted, valid = _import_applications(conn, batch, reject, base_dir, processes)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        stats['records'] = last_number
+        stats['inserted'] += inserted
+        stats['skipped'] += valid - inserted
+        if checkpoint_path:
+            _save_checkpoint(checkpoint_path, stats)
+        if on_progress:
+            on_progress(stats)
+
+    try:
+        batch, last_number = [], resume_from
+        for number, record, error in read_records(stream, fmt):
+            if number <= resume_from:
+                continue
+            last_number = number
+            if error is None:
+                try:
+                    batch.append((number, validate(kind, record, default_recruiter)))
+                except InvalidRecord as err:
+                    error = str(err)
+            if error is not None:
+                reject(number, error)
+            if len(batch) >= batch_size:
+                flush(batch, last_number)
+                batch = []
+        if batch or last_number > stats['records']:
+            flush(batch, last_number)
+    finally:
+        if processes:
+            processes.shutdown(cancel_futures=True)
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return stats
+
+
+if __name__ == '__main__':
+    from db import get_pool
+
+    parser = argparse.ArgumentParser(description="Bulk import jobs or applications from CSV or JSONL.")
+    parser.add_argument('kind', choices=sorted(IMPORT_FIELDS))
+    parser.add_argument('input', help="CSV or JSONL file to import")
+    parser.add_argument('--format', choices=IMPORT_FORMATS, help="defaults to the input file's extension")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--recruiter', help="recruiter username for job records that do not name one")
+    parser.add_argument('--workers', type=int, help="resume parsing processes (default: one per CPU)")
+    parser.add_argument('--checkpoint', help="checkpoint file (default: INPUT.checkpoint)")
+    args = parser.parse_args()
+    fmt = args.format or ('csv' if args.input.lower().endswith('.csv') else 'jsonl')
+
+    def report(stats):
+        print(f"{stats['records']} records: {stats['inserted']} inserted, "
+              f"{stats['skipped']} already present, {stats['rejected']} rejected", flush=True)
+
+    with get_pool().connection() as conn, open(args.input, newline='', encoding='utf-8') as stream:
+        result = run_import(conn, args.kind, stream, fmt, source=os.path.abspath(args.input),
+                            batch_size=args.batch_size, checkpoint_path=args.checkpoint or f"{args.input}.checkpoint",
+                            base_dir=os.path.dirname(os.path.abspath(args.input)),
+                            default_recruiter=args.recruiter, workers=args.workers, on_progress=report)
+    for number, reason in result['rejects']:
+        print(f"record {number}: {reason}", file=sys.stderr)
+    if result['rejected'] > len(result['rejects']):
+        print(f"... and {result['rejected'] - len(result['rejects'])} more rejected records", file=sys.stderr)
@@ -0,0 +1,215 @@
+"""Pooled database connections shared by every Streamlit session.
+
+DB_BACKEND selects the storage engine: 'mysql' (the default) connects with
+the DB_HOST/DB_USER/DB_PASSWORD/DB_DATABASE secrets; 'sqlite' opens the
+embedded database file at DB_PATH, so the app runs without any server.
+"""
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import mysql.connector
+from mysql.connector import errors
+import streamlit as st
+
+import sqlite_backend
+from instrumentation import get_profiler
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_POOL_TIMEOUT = 5.0  # seconds to wait for a free connection
+DEFAULT_HEALTH_CHECK_AFTER = 30.0  # idle seconds before a connection is pinged
+DEFAULT_SQLITE_PATH = 'recruitment.db'
+
+
+class ConnectionPool:
+    """A fixed-size, thread-safe pool of database connections.
+
+    Connections are opened lazily, up to ``size`` of them. When all are
+    checked out, callers wait up to ``timeout`` seconds before a PoolError is
+    raised. A connection that sat idle for longer than ``health_check_after``
+    seconds is pinged, and reconnected if the server dropped it, before it is
+    handed out again. Each connection is opened with ``connector(**connect_args)``.
+    """
+
+    def __init__(self, connect_args, size=DEFAULT_POOL_SIZE, timeout=DEFAULT_POOL_TIMEOUT,
+                 health_check_after=DEFAULT_HEALTH_CHECK_AFTER, profiler=None, connector=mysql.connector.connect):
+        self.connect_args = dict(connect_args)
+        self.connector = connector
+        self.profiler = profiler
+        self.size = size
+        self.timeout = timeout
+        self.health_check_after = health_check_after
+        self._lock = threading.Lock()
+        # Every slot starts out empty; an empty slot (None) is opened on checkout.
+        self._idle = queue.LifoQueue()
+        for _ in range(size):
+            self._idle.put((None, None))
+        self._opened = 0
+        self._in_use = 0
+        self._metrics = {
+            'checkouts': 0,
+            'waits': 0,
+            'wait_seconds': 0.0,
+            'timeouts': 0,
+            'reconnects': 0,
+            'discarded': 0,
+            'high_water': 0,
+        }
+
+    def checkout(self):
+        """Takes a live connection out of the pool, waiting if none is free."""
+        started = time.perf_counter()
+        try:
+            conn, idle_since = self._idle.get_nowait()
+        except queue.Empty:
+            conn, idle_since = self._wait_for_slot()
+
+        try:
+            if conn is None:
+                conn = self._open()
+            elif time.monotonic() - idle_since > self.health_check_after:
+                conn = self._revive(conn)
+        except Exception:
+            self._idle.put((None, None))
+            raise
+
+        with self._lock:
+            self._in_use += 1
+            self._metrics['checkouts'] += 1
+            self._metrics['high_water'] = max(self._metrics['high_water'], self._in_use)
+        if self.profiler:
+            self.profiler.record_section('connection_checkout', time.perf_counter() - started)
+        return conn
+
+    def release(self, conn):
+        """Returns a connection to the pool, discarding it if it is broken."""
+        try:
+            # Never hand the next caller an open transaction or a stale snapshot.
+            if conn.in_transaction:
+                conn.rollback()
+            slot = (conn, time.monotonic())
+        except errors.Error:
+            self._close_quietly(conn)
+            with self._lock:
+                self._opened -= 1
+                self._metrics['discarded'] += 1
+            slot = (None, None)
+
+        with self._lock:
+            self._in_use -= 1
+        self._idle.put(slot)
+
+    @contextmanager
+    def connection(self):
+        """Checks a connection out for the duration of a ``with`` block."""
+        conn = self.checkout()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def stats(self):
+        """Returns a snapshot of the pool's counters."""
+        with self._lock:
+            snapshot = dict(self._metrics)
+            snapshot.update(size=self.size, opened=self._opened, in_use=self._in_use)
+        return snapshot
+
+    def _wait_for_slot(self):
+        started = time.monotonic()
+        with self._lock:
+            self._metrics['waits'] += 1
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            with self._lock:
+                self._metrics['timeouts'] += 1
+            raise errors.PoolError(
+                f"No database connection became free within {self.timeout}s "
+                f"(pool size {self.size})."
+            ) from None
+        finally:
+            with self._lock:
+                self._metrics['wait_seconds'] += time.monotonic() - started
+
+    def _open(self):
+        conn = self.connector(**self.connect_args)
+        if self.profiler:
+            # Every cursor of a pooled connection reports its statements.
+            conn = self.profiler.wrap_connection(conn)
+        with self._lock:
+            self._opened += 1
+        return conn
+
+    def _revive(self, conn):
+        try:
+            conn.ping(reconnect=False)
+        except errors.Error:
+            with self._lock:
+                self._metrics['reconnects'] += 1
+            try:
+                conn.reconnect(attempts=1, delay=0)
+            except errors.Error:
+                self._close_quietly(conn)
+                with self._lock:
+                    self._opened -= 1
+                    self._metrics['discarded'] += 1
+                raise
+        return conn
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except errors.Error:
+            pass
+
+
+def dialect(conn):
+    """The SQL dialect of a connection: 'mysql' or 'sqlite'."""
+    return getattr(conn, 'dialect', 'mysql')
+
+
+@st.cache_resource
+def get_pool():
+    """Returns the process-wide connection pool, creating it on first use."""
+    options = {
+        'size': int(st.secrets.get("DB_POOL_SIZE", DEFAULT_POOL_SIZE)),
+        'timeout': float(st.secrets.get("DB_POOL_TIMEOUT", DEFAULT_POOL_TIMEOUT)),
+        'health_check_after': float(st.secrets.get("DB_POOL_HEALTH_CHECK_AFTER", DEFAULT_HEALTH_CHECK_AFTER)),
+        'profiler': get_profiler(),
+    }
+    if st.secrets.get("DB_BACKEND", "mysql") == 'sqlite':
+        return ConnectionPool({'database': st.secrets.get("DB_PATH", DEFAULT_SQLITE_PATH)},
+                              connector=sqlite_backend.connect, **options)
+    return ConnectionPool(
+        {
+            'host': st.secrets["DB_HOST"],
+            'user': st.secrets["DB_USER"],
+            'password': st.secrets["DB_PASSWORD"],
+            'database': st.secrets["DB_DATABASE"],
+        },
+        **options,
+    )
+
+
+@contextmanager
+def db_connection():
+    """Checks a pooled connection out for the duration of a ``with`` block.
+
+    Yields None, after reporting the error, when no connection can be
+    obtained, so callers keep their ``if conn:`` guard. The connection always
+    goes back to the pool, even when the block raises or calls st.rerun().
+    """
+    pool = get_pool()
+    try:
+        conn = pool.checkout()
+    except mysql.connector.Error as err:
+        st.error(f"Error connecting to the database: {err}")
+        yield None
+        return
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
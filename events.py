@@ -0,0 +1,118 @@
+"""Append-only feed of application changes.
+
+Every apply, withdrawal and status change adds a row to application_events
+in the same transaction as the change itself. Readers keep the ID of the
+last event they have seen and ask only for newer ones, so a dashboard can
+hold on to what it has already loaded and apply the few deltas instead of
+re-reading every application on every rerun.
+"""
+from db import dialect
+
+EVENT_TYPES = ('applied', 'withdrawn', 'status_changed')
+EVENT_BATCH_SIZE = 500
+EVENT_LOOKBACK = 1000  # event IDs behind a cursor that are read again; see events_since()
+EVENT_SETTLE_SECONDS = 60  # age after which an event's transaction is taken to have ended
+
+
+def record_events(cursor, event_type, where, params, status=None):
+    """Appends an event for every application matching ``where``. The caller commits.
+
+    ``status`` is the status the event reports; by default each
+    application's current one. Call it before a withdrawal deletes the rows
+    and before a status change updates them, with the same ``where``.
+    """
+    if event_type not in EVENT_TYPES:
+        raise ValueError(f"Unknown application event {event_type!r}.")
+    cursor.execute(f"""
+        INSERT INTO application_events (application_id, job_id, applicant_id, event_type, status)
+        SELECT id, job_id, applicant_id, %s, COALESCE(%s, status) FROM applications
+        WHERE {where}
+    """, (event_type, status, *params))
+
+
+def applicant_snapshot(conn, applicant_id):
+    """Returns ({job_id: status} for every job the applicant applied to, cursor) from one statement.
+
+    Both come from the same snapshot, so applying events_since(cursor) to
+    the statuses keeps them exact. The first events_since() may repeat
+    events the statuses already reflect; applied again in ID order they
+    leave every status as it is.
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT NULL, NULL, COALESCE(MAX(id), 0) FROM application_events
+        UNION ALL
+        SELECT job_id, status, NULL FROM applications WHERE applicant_id = %s
+    """, (applicant_id,))
+    statuses, after_id = {}, 0
+    for job_id, status, latest in cursor.fetchall():
+        if job_id is None:
+            after_id = latest
+        else:
+            statuses[job_id] = status
+    cursor.close()
+    return statuses, (after_id, ())
+
+
+def events_since(conn, cursor, applicant_id=None, job_id=None, limit=EVENT_BATCH_SIZE):
+    """Returns up to ``limit`` unseen events, oldest first, and the next cursor.
+
+    Event IDs are taken when a transaction inserts its events, not when it
+    commits, so an event may become visible after a newer one was read.
+    Each call therefore reads the EVENT_LOOKBACK IDs behind the newest seen
+    event again and drops the ones already returned. A cursor is (newest
+    event ID, IDs returned within the lookback); start from (event_id, ()).
+    Filtering by applicant or job reads only that slice of the feed's indexes.
+    """
+    after_id, seen = cursor
+    seen = set(seen)
+    clauses, params = ["id > %s"], [max(after_id - EVENT_LOOKBACK, 0)]
+    if applicant_id is not None:
+        clauses.append("applicant_id = %s")
+        params.append(applicant_id)
+    if job_id is not None:
+        clauses.append("job_id = %s")
+        params.append(job_id)
+    db_cursor = conn.cursor(dictionary=True)
+    db_cursor.execute(f"""
+        SELECT id, application_id, job_id, applicant_id, event_type, status, created_at
+        FROM application_events
+        WHERE {" AND ".join(clauses)}
+        ORDER BY id
+        LIMIT %s
+    """, (*params, limit + len(seen)))
+    events = [event for event in db_cursor.fetchall() if event['id'] not in seen][:limit]
+    db_cursor.close()
+    if events:
+        after_id = max(after_id, events[-1]['id'])
+        seen.update(event['id'] for event in events)
+    return events, (after_id, tuple(sorted(event_id for event_id in seen if event_id > after_id - EVENT_LOOKBACK)))
+
+
+def mark_events_seen(conn, user_id):
+    """Records that a user has seen every settled event so far, then commits.
+
+    Returns the event ID they had seen up to before, so a new visit can
+    still show what arrived since the previous one. Events younger than
+    EVENT_SETTLE_SECONDS are left unseen: one of them may still belong to
+    an open transaction holding a lower ID, which counting ``id >`` the mark
+    would otherwise skip for good.
+    """
+    settled = ("NOW() - INTERVAL %s SECOND" if dialect(conn) == 'mysql'
+               else "datetime('now', '-' || %s || ' seconds')")
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT last_seen_event_id FROM users WHERE id = %s FOR UPDATE", (user_id,))
+        row = cursor.fetchone()
+        cursor.execute(f"""
+            UPDATE users SET last_seen_event_id = COALESCE(
+                (SELECT id FROM application_events WHERE created_at < {settled} ORDER BY id DESC LIMIT 1), 0)
+            WHERE id = %s
+        """, (EVENT_SETTLE_SECONDS, user_id))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return row[0] if row else 0
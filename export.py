@@ -0,0 +1,188 @@
+"""Streaming CSV and Parquet exports of applicants and applications.
+
+Rows are read from an unbuffered cursor a chunk at a time and written out
+before the next chunk is fetched, so memory use stays flat however many rows
+an export has. Run ``python export.py --help`` for very large exports; the
+dashboards write the same files and offer them for download.
+"""
+import argparse
+import csv
+import os
+import tempfile
+import weakref
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+EXPORT_CHUNK_ROWS = 10000
+EXPORT_FORMATS = ('csv', 'parquet')
+
+_APPLICATION_COLUMNS = [
+    ('application_id', pa.int64()),
+    ('job_id', pa.int64()),
+    ('job_title', pa.string()),
+    ('applicant', pa.string()),
+    ('name', pa.string()),
+    ('email', pa.string()),
+    ('phone', pa.string()),
+    ('gender', pa.string()),
+    ('nationality', pa.string()),
+    ('status', pa.string()),
+    ('parse_status', pa.string()),
+    ('skill_score', pa.float64()),
+    ('applied_at', pa.timestamp('s')),
+]
+_APPLICATION_SELECT = """
+    SELECT a.id, a.job_id, j.title, u.username, a.name, a.email, a.phone, a.gender,
+           a.nationality, a.status, a.parse_status, a.skill_score, a.applied_at
+    FROM applications a
+    JOIN users u ON a.applicant_id = u.id
+    JOIN jobs j ON a.job_id = j.id
+"""
+
+EXPORTS = {
+    # One job's applicants; takes the job ID as its only parameter.
+    'job_applicants': {
+        'sql': _APPLICATION_SELECT + " WHERE a.job_id = %s ORDER BY a.id",
+        'columns': _APPLICATION_COLUMNS,
+    },
+    # Every application, for the admin.
+    'applications': {
+        'sql': _APPLICATION_SELECT + " ORDER BY a.id",
+        'columns': _APPLICATION_COLUMNS,
+    },
+    'jobs': {
+        'sql': """
+            SELECT j.id, u.username, j.company, j.job_role, j.skills_required, j.salary, j.created_at
+            FROM jobs j JOIN users u ON j.recruiter_id = u.id
+            ORDER BY j.id
+        """,
+        'columns': [
+            ('job_id', pa.int64()),
+            ('recruiter', pa.string()),
+            ('company', pa.string()),
+            ('job_role', pa.string()),
+            ('skills_required', pa.string()),
+            ('salary', pa.string()),
+            ('created_at', pa.timestamp('s')),
+        ],
+    },
+}
+
+
+def iter_chunks(conn, export, params=(), chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yields the rows of an export as lists of at most ``chunk_rows`` tuples.
+
+    The cursor is unbuffered, so the server streams the result and only one
+    chunk is held in memory at a time. ``conn`` cannot run other queries until
+    the generator is exhausted or closed.
+    """
+    cursor = conn.cursor(buffered=False)
+    cursor.execute(EXPORTS[export]['sql'], tuple(params))
+    try:
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                break
+            yield rows
+    finally:
+        # Stopped early: drain what the server is still sending before closing.
+        if conn.unread_result:
+            conn.consume_results()
+        cursor.close()
+
+
+def write_csv(chunks, columns, path):
+    """Writes chunks of rows to a CSV file with a header. Returns the row count."""
+    written = 0
+    with open(path, 'w', newline='', encoding='utf-8') as out:
+        writer = csv.writer(out)
+        writer.writerow([name for name, _ in columns])
+        for rows in chunks:
+            writer.writerows(rows)
+            written += len(rows)
+    return written
+
+
+def write_parquet(chunks, columns, path):
+    """Writes chunks of rows to a Parquet file, one row group per chunk. Returns the row count."""
+    schema = pa.schema(columns)
+    written = 0
+    with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+        for rows in chunks:
+            arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            written += len(rows)
+    return written
+
+
+def export_to_path(conn, export, path, fmt='csv', params=(), chunk_rows=EXPORT_CHUNK_ROWS):
+    """Streams one export to ``path`` as CSV or Parquet. Returns the number of rows written."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}.")
+    writer = write_csv if fmt == 'csv' else write_parquet
+    return writer(iter_chunks(conn, export, params, chunk_rows), EXPORTS[export]['columns'], path)
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class TempExport:
+    """An export written to a temporary file.
+
+    The file is deleted once take() has read it, or when the object is
+    garbage-collected, e.g. with the session state of an abandoned session.
+    """
+
+    def __init__(self, path, rows, fmt):
+        self.path = path
+        self.rows = rows
+        self.fmt = fmt
+        self._remove = weakref.finalize(self, _remove_file, path)
+
+    def exists(self):
+        return self._remove.alive and os.path.exists(self.path)
+
+    def take(self):
+        """Returns the file's bytes and deletes it."""
+        with open(self.path, 'rb') as exported:
+            data = exported.read()
+        self.discard()
+        return data
+
+    def discard(self):
+        self._remove()
+
+
+def export_to_tempfile(conn, export, fmt='csv', params=()):
+    """export_to_path() into a new temporary file. Returns a TempExport."""
+    handle, path = tempfile.mkstemp(prefix=f"{export}-", suffix=f".{fmt}")
+    os.close(handle)
+    try:
+        return TempExport(path, export_to_path(conn, export, path, fmt, params), fmt)
+    except Exception:
+        os.remove(path)
+        raise
+
+
+if __name__ == '__main__':
+    from db import get_pool
+
+    parser = argparse.ArgumentParser(description="Export applicants, applications or jobs.")
+    parser.add_argument('export', choices=sorted(EXPORTS))
+    parser.add_argument('output', help="file to write")
+    parser.add_argument('--format', choices=EXPORT_FORMATS, help="defaults to the output file's extension")
+    parser.add_argument('--job-id', type=int, help="the job to export applicants of (job_applicants only)")
+    parser.add_argument('--chunk-rows', type=int, default=EXPORT_CHUNK_ROWS)
+    args = parser.parse_args()
+    if (args.export == 'job_applicants') != (args.job_id is not None):
+        parser.error("--job-id is required for job_applicants and only allowed there")
+    fmt = args.format or ('parquet' if args.output.endswith('.parquet') else 'csv')
+    with get_pool().connection() as conn:
+        written = export_to_path(conn, args.export, args.output, fmt,
+                                 (args.job_id,) if args.job_id is not None else (), args.chunk_rows)
+    print(f"Wrote {written} rows to {args.output}.")
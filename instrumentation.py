@@ -0,0 +1,355 @@
+"""Query and render timing for every rerun.
+
+Pooled connections are wrapped so that each cursor records, per statement,
+a fingerprint of the SQL (literals and IN lists collapsed), its latency
+including fetches, the rows returned and an estimate of the bytes fetched.
+Render sections are timed the same way. Samples go to a rolling window per
+fingerprint, to the current rerun's profile, to a JSON log for slow
+statements and, when METRICS_PORT is set, to a Prometheus text endpoint.
+"""
+import json
+import logging
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SLOW_QUERY_SECONDS = 0.5
+DEFAULT_WINDOW = 1000  # recent samples kept per fingerprint
+MAX_FINGERPRINTS = 500  # distinct statements tracked; later ones share one bucket
+OTHER_FINGERPRINT = "(other)"
+
+_COMMENT_RE = re.compile(r"/\*.*?\*/|--[^\n]*", re.S)
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER_RE = re.compile(r"%s|%\(\w+\)s")
+_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_ROW_LIST_RE = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def fingerprint(sql):
+    """Normalises a statement so that executions differing only in values group together.
+
+    >>> fingerprint("SELECT * FROM t WHERE id IN (%s, %s) AND name = 'x'")
+    'SELECT * FROM t WHERE id IN (...) AND name = ?'
+    """
+    sql = _COMMENT_RE.sub(" ", sql)
+    sql = _STRING_RE.sub("?", sql)
+    sql = _PLACEHOLDER_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _LIST_RE.sub("(...)", sql)
+    sql = _ROW_LIST_RE.sub("(...)", sql)
+    return _SPACE_RE.sub(" ", sql).strip()
+
+
+def _value_size(value):
+    """Rough wire size of one fetched value: its length for text and blobs, 8 bytes otherwise."""
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    return 8
+
+
+def _rows_size(rows):
+    size = 0
+    for row in rows:
+        values = row.values() if isinstance(row, dict) else row
+        size += sum(_value_size(value) for value in values)
+    return size
+
+
+def _escape_label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+class _Series:
+    """Counters plus a rolling window of recent latencies for one fingerprint or section."""
+
+    __slots__ = ('count', 'seconds', 'rows', 'bytes', 'slow', 'recent')
+
+    def __init__(self, window):
+        self.count = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.slow = 0
+        self.recent = deque(maxlen=window)
+
+    def add(self, seconds, rows=0, size=0, slow=False):
+        self.count += 1
+        self.seconds += seconds
+        self.rows += rows
+        self.bytes += size
+        self.slow += slow
+        self.recent.append(seconds)
+
+    def snapshot(self):
+        ordered = sorted(self.recent)
+        return {
+            'count': self.count,
+            'total_seconds': self.seconds,
+            'rows': self.rows,
+            'bytes': self.bytes,
+            'slow': self.slow,
+            'p50_seconds': _percentile(ordered, 0.50),
+            'p95_seconds': _percentile(ordered, 0.95),
+            'p99_seconds': _percentile(ordered, 0.99),
+            'max_seconds': ordered[-1] if ordered else 0.0,
+        }
+
+
+class Profiler:
+    """Collects query and section timings for the whole process and per rerun.
+
+    A rerun's samples are gathered on the thread running it, between
+    rerun_started() and rerun_finished(). Samples taken outside a rerun, such
+    as those of the background resume parser, only feed the process totals.
+    """
+
+    def __init__(self, slow_query_seconds=DEFAULT_SLOW_QUERY_SECONDS, window=DEFAULT_WINDOW):
+        self.slow_query_seconds = slow_query_seconds
+        self.window = window
+        self._lock = threading.Lock()
+        self._queries = {}
+        self._sections = {}
+        self._local = threading.local()
+
+    # --- Recording ---
+
+    def record_query(self, sql, seconds, rows, size):
+        key = fingerprint(sql)
+        slow = seconds >= self.slow_query_seconds
+        with self._lock:
+            if key not in self._queries and len(self._queries) >= MAX_FINGERPRINTS:
+                key = OTHER_FINGERPRINT
+            series = self._queries.get(key)
+            if series is None:
+                series = self._queries[key] = _Series(self.window)
+            series.add(seconds, rows, size, slow)
+        profile = getattr(self._local, 'profile', None)
+        if profile is not None:
+            profile['queries'].append({'fingerprint': key, 'seconds': seconds, 'rows': rows, 'bytes': size})
+        if slow:
+            logger.warning(json.dumps({
+                'event': 'slow_query',
+                'fingerprint': key,
+                'seconds': round(seconds, 6),
+                'rows': rows,
+                'bytes': size,
+                'threshold_seconds': self.slow_query_seconds,
+            }))
+
+    def record_section(self, name, seconds):
+        with self._lock:
+            series = self._sections.get(name)
+            if series is None:
+                series = self._sections[name] = _Series(self.window)
+            series.add(seconds)
+        profile = getattr(self._local, 'profile', None)
+        if profile is not None:
+            profile['sections'].append({'section': name, 'seconds': seconds})
+
+    @contextmanager
+    def section(self, name):
+        """Times a block of rendering work, including blocks ended by st.rerun()/st.stop()."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_section(name, time.perf_counter() - started)
+
+    def rerun_started(self):
+        self._local.profile = {'started': time.perf_counter(), 'queries': [], 'sections': []}
+
+    def rerun_finished(self):
+        """Ends the current thread's rerun and returns its profile, or None."""
+        profile = getattr(self._local, 'profile', None)
+        self._local.profile = None
+        if profile is None:
+            return None
+        profile['seconds'] = time.perf_counter() - profile.pop('started')
+        profile['query_seconds'] = sum(query['seconds'] for query in profile['queries'])
+        profile['rows'] = sum(query['rows'] for query in profile['queries'])
+        profile['bytes'] = sum(query['bytes'] for query in profile['queries'])
+        self.record_section('rerun', profile['seconds'])
+        return profile
+
+    # --- Reporting ---
+
+    def snapshot(self):
+        """Returns {'queries': {fingerprint: stats}, 'sections': {name: stats}}."""
+        with self._lock:
+            return {
+                'queries': {key: series.snapshot() for key, series in self._queries.items()},
+                'sections': {name: series.snapshot() for name, series in self._sections.items()},
+            }
+
+    def reset(self):
+        with self._lock:
+            self._queries.clear()
+            self._sections.clear()
+
+    def prometheus_text(self):
+        """The process totals in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = []
+        for family, label, series_map in (('app_query', 'fingerprint', snapshot['queries']),
+                                          ('app_section', 'section', snapshot['sections'])):
+            lines.append(f"# TYPE {family}_seconds summary")
+            for key, stats in series_map.items():
+                labels = f'{label}="{_escape_label(key)}"'
+                for quantile, field in (('0.5', 'p50_seconds'), ('0.95', 'p95_seconds'), ('0.99', 'p99_seconds')):
+                    lines.append(f'{family}_seconds{{{labels},quantile="{quantile}"}} {stats[field]:.6f}')
+                lines.append(f"{family}_seconds_sum{{{labels}}} {stats['total_seconds']:.6f}")
+                lines.append(f"{family}_seconds_count{{{labels}}} {stats['count']}")
+            if family == 'app_query':
+                for metric, field in (('rows', 'rows'), ('bytes', 'bytes'), ('slow', 'slow')):
+                    lines.append(f"# TYPE app_query_{metric}_total counter")
+                    for key, stats in series_map.items():
+                        lines.append(f'app_query_{metric}_total{{fingerprint="{_escape_label(key)}"}} {stats[field]}')
+        return "\n".join(lines) + "\n"
+
+    # --- Connection wrapping ---
+
+    def wrap_connection(self, conn):
+        return InstrumentedConnection(conn, self)
+
+
+class InstrumentedConnection:
+    """A database connection whose cursors report to a Profiler."""
+
+    def __init__(self, conn, profiler):
+        self._conn = conn
+        self._profiler = profiler
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._conn.cursor(*args, **kwargs), self._profiler)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class InstrumentedCursor:
+    """Times each statement from execute() until the next execute() or close().
+
+    Fetch time, rows and bytes are attributed to the statement that produced them.
+    """
+
+    def __init__(self, cursor, profiler):
+        self._cursor = cursor
+        self._profiler = profiler
+        self._statement = None
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        self._finish()
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, params, *args, **kwargs)
+        finally:
+            self._statement = {'sql': operation, 'seconds': time.perf_counter() - started, 'rows': 0, 'bytes': 0}
+            if not self._cursor.with_rows:
+                self._statement['rows'] = max(self._cursor.rowcount, 0)
+                self._finish()
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        self._finish()
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, seq_params, *args, **kwargs)
+        finally:
+            self._statement = {'sql': operation, 'seconds': time.perf_counter() - started,
+                               'rows': max(self._cursor.rowcount, 0), 'bytes': 0}
+            self._finish()
+
+    def fetchone(self):
+        return self._fetched(self._cursor.fetchone, single=True)
+
+    def fetchmany(self, *args, **kwargs):
+        return self._fetched(lambda: self._cursor.fetchmany(*args, **kwargs))
+
+    def fetchall(self):
+        return self._fetched(self._cursor.fetchall)
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        self._finish()
+        return self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def _fetched(self, fetch, single=False):
+        started = time.perf_counter()
+        result = fetch()
+        if self._statement is not None:
+            rows = ([result] if result is not None else []) if single else result
+            self._statement['seconds'] += time.perf_counter() - started
+            self._statement['rows'] += len(rows)
+            self._statement['bytes'] += _rows_size(rows)
+        return result
+
+    def _finish(self):
+        statement, self._statement = self._statement, None
+        if statement is not None:
+            self._profiler.record_query(statement['sql'], statement['seconds'], statement['rows'], statement['bytes'])
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    profiler = None
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.profiler.prometheus_text().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(profiler, port, host='127.0.0.1'):
+    """Serves GET /metrics in the Prometheus text format from a daemon thread."""
+    handler = type('MetricsHandler', (_MetricsHandler,), {'profiler': profiler})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    return server
+
+
+@st.cache_resource
+def get_profiler():
+    """Returns the process-wide profiler, starting the metrics endpoint if configured."""
+    profiler = Profiler(slow_query_seconds=float(st.secrets.get("SLOW_QUERY_SECONDS", DEFAULT_SLOW_QUERY_SECONDS)))
+    log_path = st.secrets.get("QUERY_LOG_PATH")
+    if log_path:
+        handler = logging.FileHandler(log_path)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+    metrics_port = st.secrets.get("METRICS_PORT")
+    if metrics_port:
+        serve_metrics(profiler, int(metrics_port), st.secrets.get("METRICS_HOST", "127.0.0.1"))
+    return profiler
@@ -0,0 +1,196 @@
+"""Job board queries: keyset-paginated listings and single-job lookups."""
+import pandas as pd
+import streamlit as st
+
+from analytics import forget_jobs
+from db import get_pool
+from search import unindex_jobs
+from skills import set_job_skills
+
+JOB_PAGE_SIZE = 30
+JOB_BOARD_TTL = 60  # seconds a cached page may be served before it is re-read
+DELETE_BATCH_SIZE = 1000  # job IDs per IN (...) list
+
+
+def list_jobs_page(conn, after=None, limit=JOB_PAGE_SIZE):
+    """Returns one page of job summaries, newest first, plus the next page's cursor.
+
+    Jobs come back as plain (id, company, job_role, created_at) tuples.
+    ``after`` is the (created_at, id) of the last job on the previous page, so
+    each page is a single range scan on the (created_at, id) index no matter
+    how deep the reader has paged. The cursor condition is spelled out rather
+    than as a row comparison, which MySQL does not turn into a range. The
+    next cursor is None on the last page.
+    """
+    cursor = conn.cursor()
+    if after is None:
+        cursor.execute("""
+            SELECT id, company, job_role, created_at FROM jobs
+            ORDER BY created_at DESC, id DESC
+            LIMIT %s
+        """, (limit + 1,))
+    else:
+        cursor.execute("""
+            SELECT id, company, job_role, created_at FROM jobs
+            WHERE created_at < %s OR (created_at = %s AND id < %s)
+            ORDER BY created_at DESC, id DESC
+            LIMIT %s
+        """, (after[0], after[0], after[1], limit + 1))
+    rows = cursor.fetchall()
+    cursor.close()
+
+    # One extra row was fetched only to learn whether another page exists.
+    next_after = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_after = (rows[-1][3], rows[-1][0])
+    return rows, next_after
+
+
+def list_recruiter_jobs(conn, recruiter_id, new_since=None):
+    """Returns a recruiter's own jobs, newest first, as a DataFrame of summaries.
+
+    With ``new_since``, the mark events.mark_events_seen() returned, a
+    new_applicants column counts each job's applications after it, read
+    from the event feed's job index.
+    """
+    columns = ['id', 'title', 'company', 'job_role', 'created_at']
+    new_applicants, params = "", (recruiter_id,)
+    if new_since is not None:
+        columns.append('new_applicants')
+        new_applicants = """, (SELECT COUNT(*) FROM application_events e
+                                WHERE e.job_id = j.id AND e.event_type = 'applied' AND e.id > %s)"""
+        params = (new_since, recruiter_id)
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT j.id, j.title, j.company, j.job_role, j.created_at{new_applicants} FROM jobs j
+        WHERE j.recruiter_id = %s
+        ORDER BY j.created_at DESC, j.id DESC
+    """, params)
+    jobs = pd.DataFrame(cursor.fetchall(), columns=columns)
+    cursor.close()
+    return jobs
+
+
+def get_job(conn, job_id):
+    """Returns the full row for one job, including its description, or None."""
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("""
+        SELECT id, company, job_role, job_description, skills_required, salary, created_at
+        FROM jobs WHERE id = %s
+    """, (job_id,))
+    job = cursor.fetchone()
+    cursor.close()
+    return job
+
+
+def post_job(conn, recruiter_id, company, job_role, job_description, skills_required, salary):
+    """Creates a job with its normalised skill set, then commits. Returns its ID."""
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO jobs (recruiter_id, title, company, job_role, job_description, skills_required, salary, description)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    """, (recruiter_id, job_role, company, job_role, job_description, skills_required, salary, job_description))
+    job_id = cursor.lastrowid
+    cursor.close()
+    set_job_skills(conn, job_id, skills_required)
+    conn.commit()
+    return job_id
+
+
+def insert_jobs(conn, jobs):
+    """Bulk-inserts jobs and derives their skill sets. The caller commits.
+
+    Each job is a dict with recruiter_id, external_ref, company, job_role,
+    job_description, skills_required and salary. Jobs whose external_ref is
+    already present are skipped, so re-running an import is harmless.
+    Returns the number of jobs inserted.
+    """
+    if not jobs:
+        return 0
+    cursor = conn.cursor()
+    cursor.executemany("""
+        INSERT IGNORE INTO jobs
+        (recruiter_id, external_ref, title, company, job_role, job_description, skills_required, salary, description)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """, [(job['recruiter_id'], job['external_ref'], job['job_role'], job['company'], job['job_role'],
+           job['job_description'], job['skills_required'], job['salary'], job['job_description']) for job in jobs])
+    inserted = cursor.rowcount
+    refs = [job['external_ref'] for job in jobs]
+    cursor.execute(f"""
+        SELECT id, skills_required FROM jobs
+        WHERE external_ref IN ({", ".join(["%s"] * len(refs))}) AND skill_ids IS NULL
+    """, tuple(refs))
+    for job_id, skills_required in cursor.fetchall():
+        set_job_skills(conn, job_id, skills_required)
+    cursor.close()
+    return inserted
+
+
+def job_ids_by_ref(conn, refs):
+    """Maps each of ``refs`` that is a known job external_ref onto the job's ID."""
+    if not refs:
+        return {}
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT external_ref, id FROM jobs WHERE external_ref IN ({', '.join(['%s'] * len(refs))})",
+                   tuple(refs))
+    ids = dict(cursor.fetchall())
+    cursor.close()
+    return ids
+
+
+def delete_jobs(conn, recruiter_id, job_ids):
+    """Deletes a recruiter's jobs with their applications and search index.
+
+    Everything happens in one transaction with a few set-based statements per
+    batch of IDs, so either all of the jobs go or none do. IDs that are not
+    the recruiter's own are ignored. Returns the number of jobs deleted.
+    """
+    job_ids = list(dict.fromkeys(int(job_id) for job_id in job_ids))
+    cursor = conn.cursor()
+    deleted = 0
+    try:
+        for start in range(0, len(job_ids), DELETE_BATCH_SIZE):
+            batch = job_ids[start:start + DELETE_BATCH_SIZE]
+            placeholders = ", ".join(["%s"] * len(batch))
+            cursor.execute(f"SELECT id FROM jobs WHERE recruiter_id = %s AND id IN ({placeholders})",
+                           (recruiter_id, *batch))
+            owned = [row[0] for row in cursor.fetchall()]
+            if not owned:
+                continue
+            placeholders = ", ".join(["%s"] * len(owned))
+            unindex_jobs(conn, owned)
+            forget_jobs(cursor, owned)
+            cursor.execute(f"DELETE FROM applications WHERE job_id IN ({placeholders})", tuple(owned))
+            cursor.execute(f"DELETE FROM jobs WHERE id IN ({placeholders})", tuple(owned))
+            deleted += cursor.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return deleted
+
+
+# Cached readers shared by every session. Connection errors propagate instead
+# of being cached, so callers should catch mysql.connector.Error.
+
+@st.cache_data(ttl=JOB_BOARD_TTL, show_spinner=False)
+def load_job_page(after=None, limit=JOB_PAGE_SIZE):
+    """Cached list_jobs_page()."""
+    with get_pool().connection() as conn:
+        return list_jobs_page(conn, after, limit)
+
+
+@st.cache_data(ttl=JOB_BOARD_TTL, show_spinner=False)
+def load_job(job_id):
+    """Cached get_job()."""
+    with get_pool().connection() as conn:
+        return get_job(conn, job_id)
+
+
+def invalidate_job_board():
+    """Drops cached listings and job details after jobs are posted or deleted."""
+    load_job_page.clear()
+    load_job.clear()
@@ -0,0 +1,552 @@
+"""Versioned schema migrations.
+
+Each migration is a numbered function that is applied once and recorded in
+the schema_version table. Migrations are written to be idempotent (columns
+and indexes are only added when missing), because MySQL commits DDL
+implicitly and a migration interrupted half-way must be safe to re-run. A
+database created before this runner existed simply has every migration
+applied again, which turns into a series of no-ops.
+
+Add new migrations to the end of MIGRATIONS; never edit one that shipped.
+"""
+import argparse
+
+from db import dialect
+from resume_store import compress_text, content_hash
+
+LOCK_NAME = 'recruitment_schema_migrations'
+LOCK_TIMEOUT = 60  # seconds to wait for another process that is migrating
+
+
+class MigrationError(Exception):
+    """Raised when the schema cannot be brought up to date."""
+
+
+# --- Helpers ---
+
+def column_exists(cursor, table, column):
+    if dialect(cursor) == 'sqlite':
+        cursor.execute(f"PRAGMA table_info({table})")
+        return any(row[1] == column for row in cursor.fetchall())
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (table, column))
+    return cursor.fetchone()[0] > 0
+
+
+def index_exists(cursor, table, index):
+    if dialect(cursor) == 'sqlite':
+        cursor.execute(f"PRAGMA index_list({table})")
+        return any(row[1] == index for row in cursor.fetchall())
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+    """, (table, index))
+    return cursor.fetchone()[0] > 0
+
+
+def add_column(cursor, table, column, definition):
+    if not column_exists(cursor, table, column):
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def auto_id(cursor):
+    """The column definition of an auto-incrementing primary key."""
+    return "INTEGER PRIMARY KEY AUTOINCREMENT" if dialect(cursor) == 'sqlite' else "BIGINT AUTO_INCREMENT PRIMARY KEY"
+
+
+def add_index(cursor, table, index, columns, unique=False):
+    if not index_exists(cursor, table, index):
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        cursor.execute(f"CREATE {kind} {index} ON {table} ({columns})")
+
+
+# --- Migrations ---
+
+def _m001_initial_schema(cursor):
+    # User table with roles
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            username VARCHAR(255) UNIQUE NOT NULL,
+            password_hash VARCHAR(255) NOT NULL,
+            role ENUM('applicant', 'recruiter', 'admin') NOT NULL
+        )
+    """)
+
+    # Jobs table with new fields
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            recruiter_id INT NOT NULL,
+            company VARCHAR(255) NOT NULL,
+            job_role VARCHAR(255) NOT NULL,
+            job_description TEXT NOT NULL,
+            skills_required TEXT,
+            salary VARCHAR(255),
+            title VARCHAR(255) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (recruiter_id) REFERENCES users(id)
+        )
+    """)
+
+    # Applications table with new applicant details
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS applications (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            job_id INT NOT NULL,
+            applicant_id INT NOT NULL,
+            name VARCHAR(255),
+            email VARCHAR(255),
+            phone VARCHAR(20),
+            gender VARCHAR(50),
+            nationality VARCHAR(100),
+            resume_text TEXT,
+            status ENUM('Pending', 'In Review', 'Interview', 'Rejected', 'Hired') DEFAULT 'Pending',
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (job_id) REFERENCES jobs(id),
+            FOREIGN KEY (applicant_id) REFERENCES users(id)
+        )
+    """)
+
+
+def _m002_resume_search_index(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS resume_terms (
+            job_id INT NOT NULL,
+            term VARCHAR(64) NOT NULL,
+            application_id INT NOT NULL,
+            tf SMALLINT UNSIGNED NOT NULL,
+            doc_length INT NOT NULL,
+            PRIMARY KEY (job_id, term, application_id),
+            INDEX idx_resume_terms_application (application_id)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS resume_index_stats (
+            job_id INT PRIMARY KEY,
+            doc_count INT NOT NULL,
+            total_length BIGINT NOT NULL
+        )
+    """)
+
+
+def _m003_resume_parse_status(cursor):
+    add_column(cursor, 'applications', 'parse_status', "ENUM('pending', 'done', 'failed') NOT NULL DEFAULT 'done'")
+    add_column(cursor, 'applications', 'parse_error', "VARCHAR(255)")
+
+
+def _m004_skill_scores(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS skills (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(100) NOT NULL UNIQUE
+        )
+    """)
+    add_column(cursor, 'jobs', 'skill_ids', "VARBINARY(2048)")
+    add_column(cursor, 'applications', 'skill_ids', "BLOB")
+    add_column(cursor, 'applications', 'skill_score', "FLOAT")
+    add_index(cursor, 'applications', 'idx_applications_job_score', "job_id, skill_score")
+
+
+def _m005_jobs_description(cursor):
+    # "Post a New Job" and the admin dashboard have always used this column,
+    # but the original create_tables() never created it.
+    add_column(cursor, 'jobs', 'description', "TEXT")
+    cursor.execute("UPDATE jobs SET description = job_description WHERE description IS NULL")
+
+
+def _m006_hot_path_indexes(cursor):
+    # Job board keyset pagination and a recruiter's own postings.
+    add_index(cursor, 'jobs', 'idx_jobs_created', "created_at, id")
+    add_index(cursor, 'jobs', 'idx_jobs_recruiter', "recruiter_id, created_at")
+
+    # One application per applicant and job. Older databases may hold
+    # duplicates; keep the earliest one (and its search postings).
+    if not index_exists(cursor, 'applications', 'uq_applications_job_applicant'):
+        cursor.execute("""
+            DELETE t FROM resume_terms t
+            JOIN applications a ON a.id = t.application_id
+            JOIN applications earlier ON earlier.job_id = a.job_id
+                AND earlier.applicant_id = a.applicant_id AND earlier.id < a.id
+        """)
+        cursor.execute("""
+            DELETE a FROM applications a
+            JOIN applications earlier ON earlier.job_id = a.job_id
+                AND earlier.applicant_id = a.applicant_id AND earlier.id < a.id
+        """)
+        cursor.execute("""
+            REPLACE INTO resume_index_stats (job_id, doc_count, total_length)
+            SELECT job_id, COUNT(*), SUM(doc_length)
+            FROM (SELECT DISTINCT job_id, application_id, doc_length FROM resume_terms) docs
+            GROUP BY job_id
+        """)
+        add_index(cursor, 'applications', 'uq_applications_job_applicant', "job_id, applicant_id", unique=True)
+
+    # An applicant's statuses for the job board, answered from the index alone.
+    add_index(cursor, 'applications', 'idx_applications_applicant', "applicant_id, job_id, status")
+    # Recruiter chart aggregates, answered from the index alone.
+    add_index(cursor, 'applications', 'idx_applications_job_breakdown', "job_id, status, gender, nationality")
+
+
+def _m007_admin_browse_indexes(cursor):
+    # Keyset paging of the admin "All Applications" table by submission time.
+    add_index(cursor, 'applications', 'idx_applications_applied', "applied_at, id")
+
+
+def _m008_resume_store(cursor, batch_size=500):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS resumes (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            content_hash BINARY(32) NOT NULL UNIQUE,
+            filename VARCHAR(255) NOT NULL,
+            byte_size INT NOT NULL,
+            original LONGBLOB NOT NULL,
+            text_zlib MEDIUMBLOB,
+            parse_status ENUM('pending', 'done', 'failed') NOT NULL DEFAULT 'pending',
+            parse_error VARCHAR(255),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    add_column(cursor, 'applications', 'resume_id', "INT")
+    add_index(cursor, 'applications', 'idx_applications_resume', "resume_id, parse_status")
+    if not column_exists(cursor, 'applications', 'resume_text'):
+        return
+
+    # Move inline resume text into the store. The uploaded files were never
+    # kept, so the text itself stands in for the original.
+    last_id = 0
+    while True:
+        cursor.execute("""
+            SELECT id, resume_text, parse_status, parse_error FROM applications
+            WHERE id > %s AND resume_id IS NULL AND resume_text IS NOT NULL
+            ORDER BY id LIMIT %s
+        """, (last_id, batch_size))
+        batch = cursor.fetchall()
+        if not batch:
+            break
+        for application_id, resume_text, parse_status, parse_error in batch:
+            data = resume_text.encode('utf-8')
+            digest = content_hash(data)
+            cursor.execute("SELECT id FROM resumes WHERE content_hash = %s", (digest,))
+            row = cursor.fetchone()
+            if row:
+                resume_id = row[0]
+            else:
+                cursor.execute("""
+                    INSERT INTO resumes (content_hash, filename, byte_size, original, text_zlib, parse_status, parse_error)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """, (digest, 'resume.txt', len(data), data, compress_text(resume_text), parse_status, parse_error))
+                resume_id = cursor.lastrowid
+            cursor.execute("UPDATE applications SET resume_id = %s WHERE id = %s", (resume_id, application_id))
+        last_id = batch[-1][0]
+    cursor.execute("ALTER TABLE applications DROP COLUMN resume_text")
+
+
+def _m009_job_external_refs(cursor):
+    # The ID a job had in the system it was imported from; makes imports re-runnable.
+    add_column(cursor, 'jobs', 'external_ref', "VARCHAR(100)")
+    add_index(cursor, 'jobs', 'uq_jobs_external_ref', "external_ref", unique=True)
+
+
+def _m010_application_events(cursor):
+    # No foreign keys: the feed is append-only and outlives withdrawn applications.
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS application_events (
+            id {auto_id(cursor)},
+            application_id INT NOT NULL,
+            job_id INT NOT NULL,
+            applicant_id INT NOT NULL,
+            event_type VARCHAR(20) NOT NULL,
+            status VARCHAR(20),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    add_index(cursor, 'application_events', 'idx_application_events_applicant', "applicant_id, id")
+    add_index(cursor, 'application_events', 'idx_application_events_job', "job_id, event_type, id")
+    add_column(cursor, 'users', 'last_seen_event_id', "BIGINT NOT NULL DEFAULT 0")
+
+
+def _m011_analytics_summaries(cursor):
+    # When an application first reached Interview and Hired, for the time-to-stage
+    # histograms; backfilled from the event feed below.
+    add_column(cursor, 'applications', 'interview_at', "TIMESTAMP NULL")
+    add_column(cursor, 'applications', 'hired_at', "TIMESTAMP NULL")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS analytics_job_status (
+            job_id INT NOT NULL,
+            status VARCHAR(20) NOT NULL,
+            applicants INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (job_id, status)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS analytics_job_daily (
+            job_id INT NOT NULL,
+            day DATE NOT NULL,
+            applications INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (job_id, day)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS analytics_stage_durations (
+            job_id INT NOT NULL,
+            stage VARCHAR(20) NOT NULL,
+            bucket SMALLINT NOT NULL,
+            applications INT NOT NULL DEFAULT 0,
+            total_seconds BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (job_id, stage, bucket)
+        )
+    """)
+    for stage, column in (('Interview', 'interview_at'), ('Hired', 'hired_at')):
+        entered = """
+            SELECT application_id, MIN(created_at) AS entered_at FROM application_events
+            WHERE event_type = 'status_changed' AND status = %s
+            GROUP BY application_id
+        """
+        if dialect(cursor) == 'sqlite':
+            cursor.execute(f"""
+                UPDATE applications SET {column} = e.entered_at FROM ({entered}) e
+                WHERE e.application_id = applications.id AND applications.{column} IS NULL
+            """, (stage,))
+        else:
+            cursor.execute(f"""
+                UPDATE applications a JOIN ({entered}) e ON e.application_id = a.id
+                SET a.{column} = e.entered_at WHERE a.{column} IS NULL
+            """, (stage,))
+
+    # Fill the summaries from the raw rows. Written out here rather than calling
+    # analytics.rebuild(), so later changes to analytics.py leave this migration as it shipped.
+    for table in ('analytics_job_status', 'analytics_job_daily', 'analytics_stage_durations'):
+        cursor.execute(f"DELETE FROM {table}")
+    cursor.execute("""
+        INSERT INTO analytics_job_status (job_id, status, applicants)
+        SELECT job_id, status, COUNT(*) FROM applications GROUP BY job_id, status
+    """)
+    cursor.execute("""
+        INSERT INTO analytics_job_daily (job_id, day, applications)
+        SELECT job_id, DATE(applied_at), COUNT(*) FROM applications GROUP BY job_id, DATE(applied_at)
+    """)
+    for stage, column in (('Interview', 'interview_at'), ('Hired', 'hired_at')):
+        if dialect(cursor) == 'sqlite':
+            seconds = f"MAX(CAST(ROUND((julianday({column}) - julianday(applied_at)) * 86400) AS INTEGER), 0)"
+        else:
+            seconds = f"GREATEST(TIMESTAMPDIFF(SECOND, applied_at, {column}), 0)"
+        # Buckets end at 1, 3, 7, 14, 30 and 60 days; the last one is open-ended.
+        cursor.execute(f"""
+            INSERT INTO analytics_stage_durations (job_id, stage, bucket, applications, total_seconds)
+            SELECT job_id, %s, CASE WHEN seconds < 86400 THEN 0 WHEN seconds < 259200 THEN 1
+                                    WHEN seconds < 604800 THEN 2 WHEN seconds < 1209600 THEN 3
+                                    WHEN seconds < 2592000 THEN 4 WHEN seconds < 5184000 THEN 5 ELSE 6 END AS bucket,
+                   COUNT(*), SUM(seconds)
+            FROM (SELECT job_id, {seconds} AS seconds FROM applications WHERE {column} IS NOT NULL) d
+            GROUP BY job_id, bucket
+        """, (stage,))
+
+
+def _m012_resume_skills(cursor):
+    # Skills are extracted once per resume and copied to every application using
+    # it. Any scored application already holds its resume's set; the rest are
+    # extracted when a resume is next applied with.
+    add_column(cursor, 'resumes', 'skill_ids', "BLOB")
+    cursor.execute("""
+        UPDATE resumes SET skill_ids = (
+            SELECT a.skill_ids FROM applications a
+            WHERE a.resume_id = resumes.id AND a.skill_ids IS NOT NULL LIMIT 1
+        )
+        WHERE skill_ids IS NULL
+    """)
+
+
+MIGRATIONS = [
+    (1, 'initial schema', _m001_initial_schema),
+    (2, 'resume search index', _m002_resume_search_index),
+    (3, 'resume parse status', _m003_resume_parse_status),
+    (4, 'skill scores', _m004_skill_scores),
+    (5, 'jobs.description column', _m005_jobs_description),
+    (6, 'hot path indexes', _m006_hot_path_indexes),
+    (7, 'admin browse indexes', _m007_admin_browse_indexes),
+    (8, 'resume store', _m008_resume_store),
+    (9, 'job external refs', _m009_job_external_refs),
+    (10, 'application events', _m010_application_events),
+    (11, 'analytics summaries', _m011_analytics_summaries),
+    (12, 'resume skills', _m012_resume_skills),
+]
+
+
+# The schema MIGRATIONS 1 to SQLITE_SCHEMA_VERSION build, written for SQLite,
+# which cannot run the MySQL DDL of those migrations. A new SQLite database is
+# created from it; every later migration must run on both engines.
+SQLITE_SCHEMA_VERSION = 9
+SQLITE_SCHEMA = """
+CREATE TABLE users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username VARCHAR(255) UNIQUE NOT NULL,
+    password_hash VARCHAR(255) NOT NULL,
+    role TEXT NOT NULL CHECK (role IN ('applicant', 'recruiter', 'admin'))
+);
+CREATE TABLE jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    recruiter_id INT NOT NULL REFERENCES users(id),
+    company VARCHAR(255) NOT NULL,
+    job_role VARCHAR(255) NOT NULL,
+    job_description TEXT NOT NULL,
+    skills_required TEXT,
+    salary VARCHAR(255),
+    title VARCHAR(255) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    skill_ids BLOB,
+    description TEXT,
+    external_ref VARCHAR(100)
+);
+CREATE INDEX idx_jobs_created ON jobs (created_at, id);
+CREATE INDEX idx_jobs_recruiter ON jobs (recruiter_id, created_at);
+CREATE UNIQUE INDEX uq_jobs_external_ref ON jobs (external_ref);
+CREATE TABLE resumes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    content_hash BLOB NOT NULL UNIQUE,
+    filename VARCHAR(255) NOT NULL,
+    byte_size INT NOT NULL,
+    original BLOB NOT NULL,
+    text_zlib BLOB,
+    parse_status TEXT NOT NULL DEFAULT 'pending' CHECK (parse_status IN ('pending', 'done', 'failed')),
+    parse_error VARCHAR(255),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE applications (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id INT NOT NULL REFERENCES jobs(id),
+    applicant_id INT NOT NULL REFERENCES users(id),
+    name VARCHAR(255),
+    email VARCHAR(255),
+    phone VARCHAR(20),
+    gender VARCHAR(50),
+    nationality VARCHAR(100),
+    status TEXT DEFAULT 'Pending' CHECK (status IN ('Pending', 'In Review', 'Interview', 'Rejected', 'Hired')),
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    parse_status TEXT NOT NULL DEFAULT 'done' CHECK (parse_status IN ('pending', 'done', 'failed')),
+    parse_error VARCHAR(255),
+    skill_ids BLOB,
+    skill_score FLOAT,
+    resume_id INT
+);
+CREATE INDEX idx_applications_job_score ON applications (job_id, skill_score);
+CREATE UNIQUE INDEX uq_applications_job_applicant ON applications (job_id, applicant_id);
+CREATE INDEX idx_applications_applicant ON applications (applicant_id, job_id, status);
+CREATE INDEX idx_applications_job_breakdown ON applications (job_id, status, gender, nationality);
+CREATE INDEX idx_applications_applied ON applications (applied_at, id);
+CREATE INDEX idx_applications_resume ON applications (resume_id, parse_status);
+CREATE TABLE resume_terms (
+    job_id INT NOT NULL,
+    term VARCHAR(64) NOT NULL,
+    application_id INT NOT NULL,
+    tf SMALLINT NOT NULL,
+    doc_length INT NOT NULL,
+    PRIMARY KEY (job_id, term, application_id)
+) WITHOUT ROWID;
+CREATE INDEX idx_resume_terms_application ON resume_terms (application_id);
+CREATE TABLE resume_index_stats (
+    job_id INT PRIMARY KEY,
+    doc_count INT NOT NULL,
+    total_length BIGINT NOT NULL
+);
+CREATE TABLE skills (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name VARCHAR(100) NOT NULL UNIQUE
+)
+"""
+
+
+# --- Runner ---
+
+def applied_versions(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("SELECT version FROM schema_version")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def pending_migrations(conn):
+    """Returns the (version, name) of every migration not yet applied."""
+    cursor = conn.cursor()
+    applied = applied_versions(cursor)
+    cursor.close()
+    return [(version, name) for version, name, _ in MIGRATIONS if version not in applied]
+
+
+def apply_migrations(conn):
+    """Brings the schema up to date and returns the versions it applied.
+
+    On MySQL a named lock serialises concurrent app processes starting up
+    against the same database; the others wait and then find nothing to do.
+    SQLite runs every migration in a write transaction instead.
+    """
+    if dialect(conn) == 'sqlite':
+        return _apply_sqlite_migrations(conn)
+    cursor = conn.cursor()
+    cursor.execute("SELECT GET_LOCK(%s, %s)", (LOCK_NAME, LOCK_TIMEOUT))
+    if cursor.fetchone()[0] != 1:
+        cursor.close()
+        raise MigrationError(f"Timed out after {LOCK_TIMEOUT}s waiting for another process to finish migrating.")
+    try:
+        return _apply_pending(conn, cursor)
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+        cursor.fetchone()
+        cursor.close()
+
+
+def _apply_pending(conn, cursor):
+    applied = applied_versions(cursor)
+    newly_applied = []
+    for version, name, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+        migrate(cursor)
+        cursor.execute("INSERT INTO schema_version (version, name) VALUES (%s, %s)", (version, name))
+        conn.commit()
+        newly_applied.append(version)
+    return newly_applied
+
+
+def _apply_sqlite_migrations(conn):
+    cursor = conn.cursor()
+    try:
+        # An empty write takes the database's write lock before anything is read.
+        cursor.execute("CREATE TABLE IF NOT EXISTS schema_version (version INT PRIMARY KEY, name VARCHAR(255) NOT NULL, "
+                       "applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)")
+        newly_applied = []
+        if not applied_versions(cursor):
+            for statement in SQLITE_SCHEMA.split(";"):
+                cursor.execute(statement)
+            cursor.executemany("INSERT INTO schema_version (version, name) VALUES (%s, %s)",
+                               [(version, name) for version, name, _ in MIGRATIONS if version <= SQLITE_SCHEMA_VERSION])
+            conn.commit()
+            newly_applied = [version for version, _, _ in MIGRATIONS if version <= SQLITE_SCHEMA_VERSION]
+        return newly_applied + _apply_pending(conn, cursor)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+if __name__ == '__main__':
+    from db import get_pool
+
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations.")
+    parser.add_argument('--status', action='store_true', help="list pending migrations without applying them")
+    args = parser.parse_args()
+    with get_pool().connection() as conn:
+        if args.status:
+            for version, name in pending_migrations(conn):
+                print(f"pending: {version:03d} {name}")
+        else:
+            versions = apply_migrations(conn)
+            print(f"Applied migrations: {versions}" if versions else "Schema is up to date.")
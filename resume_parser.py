@@ -0,0 +1,237 @@
+"""Background resume text extraction.
+
+PDF parsing is CPU-bound and can take seconds for long or scanned files, so
+it runs in a small process pool instead of on the Streamlit script thread.
+New resumes are stored with parse_status 'pending' and the extracted text
+is written back, for every application using the resume, once the worker
+finishes.
+"""
+import io
+import logging
+import multiprocessing
+import signal
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+import PyPDF2
+import streamlit as st
+
+from applications import complete_resume_parse, fail_resume_parse
+from db import get_pool
+
+logger = logging.getLogger(__name__)
+
+MAX_RESUME_BYTES = 10 * 1024 * 1024
+MAX_RESUME_PAGES = 50  # later pages of longer files are ignored
+PARSE_TIMEOUT = 30.0  # seconds one file may spend in a worker
+TIMEOUT_GRACE = 5.0  # extra seconds the dispatcher waits before giving up on a worker
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_PENDING = 32
+
+
+class ParseTimeout(Exception):
+    """Raised inside a worker when a file exceeds its parse time budget."""
+
+
+class ParserBusy(RuntimeError):
+    """Raised when the parse queue is full."""
+
+
+def decode_text(data):
+    """Decodes an uploaded plain-text resume."""
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return data.decode('latin-1')
+
+
+def extract_text(data, filename, max_pages=MAX_RESUME_PAGES):
+    """Extracts the text of an uploaded resume given its raw bytes."""
+    if filename.lower().endswith('.txt'):
+        return decode_text(data)
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(data))
+    pages = pdf_reader.pages
+    return ''.join(pages[page_num].extract_text() or '' for page_num in range(min(len(pages), max_pages)))
+
+
+def _raise_timeout(signum, frame):
+    raise ParseTimeout("Resume parsing timed out.")
+
+
+def parse_in_worker(data, filename, max_pages, timeout):
+    """Worker entry point: extract_text() under a SIGALRM deadline.
+
+    Returns the text and the seconds spent parsing.
+    """
+    started = time.perf_counter()
+    has_alarm = hasattr(signal, 'SIGALRM')
+    if has_alarm:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        text = extract_text(data, filename, max_pages)
+    finally:
+        if has_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    return text, time.perf_counter() - started
+
+
+class ResumeParser:
+    """A bounded queue of resume parse jobs feeding a process pool.
+
+    ``on_parsed(key, text)`` or ``on_failed(key, reason)`` is called from a
+    dispatcher thread once each job finishes. At most ``max_pending`` jobs
+    may be queued or running; submit() raises ParserBusy beyond that. A key
+    that is already queued or running is not submitted twice.
+    """
+
+    def __init__(self, on_parsed, on_failed, workers=DEFAULT_WORKERS, max_pending=DEFAULT_MAX_PENDING,
+                 timeout=PARSE_TIMEOUT, max_pages=MAX_RESUME_PAGES):
+        self.on_parsed = on_parsed
+        self.on_failed = on_failed
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.max_pages = max_pages
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._active = set()  # keys queued or running
+        self._processes = self._new_process_pool()
+        # One dispatcher thread per worker process, so jobs beyond that wait here.
+        self._dispatch = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='resume-parse')
+        self._parse_seconds = deque(maxlen=500)
+        self._metrics = {
+            'submitted': 0,
+            'queued': 0,
+            'in_flight': 0,
+            'completed': 0,
+            'failed': 0,
+            'timeouts': 0,
+            'queue_wait_seconds': 0.0,
+        }
+
+    def submit(self, key, data, filename):
+        """Queues one file for parsing; raises ParserBusy if the queue is full.
+
+        Returns False, without queueing it again, if ``key`` is already queued or running.
+        """
+        with self._lock:
+            if key in self._active:
+                return False
+            if not self._slots.acquire(blocking=False):
+                raise ParserBusy("Too many resumes are being processed right now.")
+            self._active.add(key)
+            self._metrics['submitted'] += 1
+            self._metrics['queued'] += 1
+        self._dispatch.submit(self._run, key, data, filename, time.monotonic())
+        return True
+
+    def is_busy(self):
+        """Whether a submit() right now would be rejected."""
+        with self._lock:
+            return self._metrics['queued'] + self._metrics['in_flight'] >= self.max_pending
+
+    def stats(self):
+        """Returns counters plus parse-time percentiles over recent jobs."""
+        with self._lock:
+            snapshot = dict(self._metrics)
+            recent = sorted(self._parse_seconds)
+        snapshot['parse_p50_seconds'] = recent[len(recent) // 2] if recent else 0.0
+        snapshot['parse_p95_seconds'] = recent[int(len(recent) * 0.95)] if recent else 0.0
+        snapshot['parse_max_seconds'] = recent[-1] if recent else 0.0
+        return snapshot
+
+    def _new_process_pool(self):
+        # Never fork the Streamlit server process with all of its threads.
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+
+    def _run(self, key, data, filename, enqueued_at):
+        with self._lock:
+            self._metrics['queued'] -= 1
+            self._metrics['in_flight'] += 1
+            self._metrics['queue_wait_seconds'] += time.monotonic() - enqueued_at
+        try:
+            text, elapsed = self._parse(data, filename)
+        except (ParseTimeout, FutureTimeout):
+            self._record_failure(timed_out=True)
+            self._notify(self.on_failed, key, f"Parsing took longer than {self.timeout:.0f}s.")
+        except Exception as err:
+            self._record_failure(timed_out=False)
+            self._notify(self.on_failed, key, f"Could not read resume: {err}")
+        else:
+            with self._lock:
+                self._metrics['completed'] += 1
+                self._parse_seconds.append(elapsed)
+            self._notify(self.on_parsed, key, text)
+        finally:
+            with self._lock:
+                self._metrics['in_flight'] -= 1
+                self._active.discard(key)
+            self._slots.release()
+
+    def _parse(self, data, filename, retry=True):
+        processes = self._processes
+        try:
+            future = processes.submit(parse_in_worker, data, filename, self.max_pages, self.timeout)
+            return future.result(timeout=self.timeout + TIMEOUT_GRACE)
+        except FutureTimeout:
+            # The worker ignored its alarm (e.g. stuck in C code); it would hold its slot for good.
+            self._replace_pool(processes, kill=True)
+            raise
+        except RuntimeError as err:  # BrokenProcessPool, or submitting to a pool just shut down
+            if retry and self._processes is not processes:
+                # Another job's hung worker took this pool down with it; this file is not to blame.
+                return self._parse(data, filename, retry=False)
+            if isinstance(err, BrokenProcessPool):
+                # A worker died (e.g. crashed inside a PDF); start a fresh pool for later jobs.
+                self._replace_pool(processes)
+            raise
+
+    def _replace_pool(self, processes, kill=False):
+        with self._lock:
+            if self._processes is not processes:
+                return
+            self._processes = self._new_process_pool()
+        if kill:
+            for process in list((getattr(processes, '_processes', None) or {}).values()):
+                process.kill()
+            processes.shutdown(wait=False, cancel_futures=True)
+
+    def _record_failure(self, timed_out):
+        with self._lock:
+            self._metrics['failed'] += 1
+            if timed_out:
+                self._metrics['timeouts'] += 1
+
+    @staticmethod
+    def _notify(callback, key, value):
+        try:
+            callback(key, value)
+        except Exception:
+            logger.exception("Resume parse callback failed for %s", key)
+
+
+def _store_parsed(resume_id, resume_text):
+    with get_pool().connection() as conn:
+        complete_resume_parse(conn, resume_id, resume_text)
+
+
+def _store_failed(resume_id, reason):
+    with get_pool().connection() as conn:
+        fail_resume_parse(conn, resume_id, reason)
+
+
+@st.cache_resource
+def get_resume_parser():
+    """Returns the process-wide resume parser, starting it on first use."""
+    return ResumeParser(
+        _store_parsed,
+        _store_failed,
+        workers=int(st.secrets.get("RESUME_PARSE_WORKERS", DEFAULT_WORKERS)),
+        max_pending=int(st.secrets.get("RESUME_PARSE_MAX_PENDING", DEFAULT_MAX_PENDING)),
+        timeout=float(st.secrets.get("RESUME_PARSE_TIMEOUT", PARSE_TIMEOUT)),
+    )
@@ -0,0 +1,115 @@
+"""Content-addressed storage for uploaded resumes.
+
+Each distinct file is stored once in the ``resumes`` table, keyed by the
+SHA-256 of its bytes, next to its extracted text compressed with zlib.
+Applications only hold a resume_id, so listing applicants never reads a
+resume, and the same file uploaded to many jobs is stored and parsed once.
+"""
+import hashlib
+import zlib
+
+from mysql.connector import errors
+
+COMPRESSION_LEVEL = 6
+
+
+def content_hash(data):
+    """The 32-byte SHA-256 digest that identifies a file's contents."""
+    return hashlib.sha256(data).digest()
+
+
+def compress_text(text):
+    return zlib.compress(text.encode('utf-8'), COMPRESSION_LEVEL)
+
+
+def decompress_text(blob):
+    return zlib.decompress(blob).decode('utf-8') if blob is not None else None
+
+
+def find_resume(conn, digest, for_update=False):
+    """Returns {'id', 'parse_status'} for the resume with this content hash, or None.
+
+    ``for_update`` locks the row and reads its latest committed version, not
+    the transaction's snapshot.
+    """
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("SELECT id, parse_status FROM resumes WHERE content_hash = %s" + (" FOR UPDATE" if for_update else ""),
+                   (digest,))
+    resume = cursor.fetchone()
+    cursor.close()
+    return resume
+
+
+def store_resume(conn, data, filename, text=None, commit=True):
+    """Stores an uploaded file unless an identical one exists, then commits.
+
+    Pass the ``text`` when it is already known (plain-text uploads); otherwise
+    the new resume is left 'pending' for the background parser. Returns a
+    dict with id, parse_status and created, which is False when the upload
+    matched a stored file. With ``commit=False`` the caller commits.
+    """
+    digest = content_hash(data)
+    resume = find_resume(conn, digest)
+    if resume:
+        return {**resume, 'created': False}
+    cursor = conn.cursor()
+    try:
+        try:
+            cursor.execute("""
+                INSERT INTO resumes (content_hash, filename, byte_size, original, text_zlib, parse_status)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """, (digest, filename[:255], len(data), data,
+                  compress_text(text) if text is not None else None,
+                  'done' if text is not None else 'pending'))
+            resume = {'id': cursor.lastrowid, 'parse_status': 'done' if text is not None else 'pending',
+                      'created': True}
+        except errors.IntegrityError:
+            # Another session may have stored the same file between our lookup
+            # and insert; only the failed statement is undone, so a caller's
+            # transaction goes on. Any other constraint violation is re-raised.
+            resume = find_resume(conn, digest, for_update=True)
+            if resume is None:
+                raise
+            resume = {**resume, 'created': False}
+        if commit:
+            conn.commit()
+    except Exception:
+        if commit:
+            conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return resume
+
+
+def retry_resume(conn, resume_id, commit=True):
+    """Puts a resume that failed to parse back in the 'pending' state.
+
+    Commits unless told not to.
+    """
+    cursor = conn.cursor()
+    cursor.execute("UPDATE resumes SET parse_status = 'pending', parse_error = NULL WHERE id = %s AND parse_status = 'failed'",
+                   (resume_id,))
+    cursor.close()
+    if commit:
+        conn.commit()
+
+
+def load_resume_text(conn, resume_id):
+    """Returns the extracted text of one resume, or None if it is not parsed."""
+    if resume_id is None:
+        return None
+    cursor = conn.cursor()
+    cursor.execute("SELECT text_zlib FROM resumes WHERE id = %s", (resume_id,))
+    row = cursor.fetchone()
+    cursor.close()
+    return decompress_text(row[0]) if row else None
+
+
+def load_original(conn, resume_id):
+    """Returns (filename, original bytes) of one resume, or None."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT filename, original FROM resumes WHERE id = %s", (resume_id,))
+    row = cursor.fetchone()
+    cursor.close()
+    return (row[0], bytes(row[1])) if row else None
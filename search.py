@@ -0,0 +1,188 @@
+"""BM25 candidate search over applicants' resumes.
+
+Each indexed resume is stored as (job_id, term, application_id, tf) postings
+plus its length, and per-job document counts are kept in resume_index_stats.
+Scoring happens in SQL over the postings of the query terms only, so ranking
+a job's applicants never reads a resume blob into the Streamlit process.
+"""
+import argparse
+import math
+import re
+from collections import Counter
+
+from db import dialect
+from resume_store import decompress_text
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_TERM_LENGTH = 64
+MAX_QUERY_TERMS = 32
+MAX_TF = 65535  # resume_terms.tf is a SMALLINT UNSIGNED
+
+# Keeps skill spellings such as "c++", "c#" and "node.js" in one token.
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+STOPWORDS = frozenset("""
+    a an and are as at be by for from has have in is it of on or our that the
+    their this to was were will with you your i me my we us
+""".split())
+
+
+def tokenize(text):
+    """Splits text into lower-cased search terms, dropping stopwords."""
+    terms = []
+    for token in TOKEN_RE.findall((text or "").lower()):
+        token = token.rstrip(".")
+        if token and token not in STOPWORDS and len(token) <= MAX_TERM_LENGTH:
+            terms.append(token)
+    return terms
+
+
+def index_application(conn, application_id, job_id, resume_text):
+    """Adds one application's resume to the index. The caller commits."""
+    terms = tokenize(resume_text)
+    if not terms:
+        return
+    doc_length = len(terms)
+    cursor = conn.cursor()
+    cursor.executemany(
+        "INSERT INTO resume_terms (job_id, term, application_id, tf, doc_length) VALUES (%s, %s, %s, %s, %s)",
+        [(job_id, term, application_id, min(tf, MAX_TF), doc_length) for term, tf in Counter(terms).items()],
+    )
+    if dialect(conn) == 'sqlite':
+        cursor.execute("""
+            INSERT INTO resume_index_stats (job_id, doc_count, total_length) VALUES (%s, 1, %s)
+            ON CONFLICT (job_id) DO UPDATE SET doc_count = doc_count + 1, total_length = total_length + excluded.total_length
+        """, (job_id, doc_length))
+    else:
+        cursor.execute("""
+            INSERT INTO resume_index_stats (job_id, doc_count, total_length) VALUES (%s, 1, %s)
+            ON DUPLICATE KEY UPDATE doc_count = doc_count + 1, total_length = total_length + VALUES(total_length)
+        """, (job_id, doc_length))
+    cursor.close()
+
+
+def unindex_application(conn, application_id):
+    """Removes one application's resume from the index. The caller commits."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT job_id, doc_length FROM resume_terms WHERE application_id = %s LIMIT 1",
+                   (application_id,))
+    row = cursor.fetchone()
+    if row:
+        job_id, doc_length = row
+        cursor.execute("DELETE FROM resume_terms WHERE application_id = %s", (application_id,))
+        cursor.execute("""
+            UPDATE resume_index_stats SET doc_count = doc_count - 1, total_length = total_length - %s
+            WHERE job_id = %s
+        """, (doc_length, job_id))
+    cursor.close()
+
+
+def unindex_jobs(conn, job_ids):
+    """Drops the whole index of each job in ``job_ids``. The caller commits."""
+    if not job_ids:
+        return
+    placeholders = ", ".join(["%s"] * len(job_ids))
+    cursor = conn.cursor()
+    cursor.execute(f"DELETE FROM resume_terms WHERE job_id IN ({placeholders})", tuple(job_ids))
+    cursor.execute(f"DELETE FROM resume_index_stats WHERE job_id IN ({placeholders})", tuple(job_ids))
+    cursor.close()
+
+
+def search_applicants(conn, job_id, query, limit=20):
+    """Returns the top ``limit`` applicants of a job ranked by BM25 against ``query``.
+
+    Each result is a dict with application_id, name, email, status and score.
+    Applicants whose resumes share no term with the query are not returned.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+    if not terms:
+        return []
+
+    cursor = conn.cursor()
+    cursor.execute("SELECT doc_count, total_length FROM resume_index_stats WHERE job_id = %s", (job_id,))
+    stats = cursor.fetchone()
+    if not stats or not stats[0]:
+        cursor.close()
+        return []
+    doc_count, total_length = stats
+    avg_length = float(total_length) / doc_count
+
+    placeholders = ", ".join(["%s"] * len(terms))
+    cursor.execute(f"""
+        SELECT term, COUNT(*) FROM resume_terms
+        WHERE job_id = %s AND term IN ({placeholders})
+        GROUP BY term
+    """, (job_id, *terms))
+    doc_freqs = dict(cursor.fetchall())
+    if not doc_freqs:
+        cursor.close()
+        return []
+
+    # Lucene-style BM25 idf, which never goes negative for very common terms.
+    weights = {term: math.log(1 + (doc_count - df + 0.5) / (df + 0.5)) for term, df in doc_freqs.items()}
+    case_arms = " ".join(["WHEN %s THEN %s"] * len(weights))
+    weight_params = [value for pair in weights.items() for value in pair]
+    term_placeholders = ", ".join(["%s"] * len(weights))
+    cursor.execute(f"""
+        SELECT s.application_id, a.name, a.email, a.status, s.score
+        FROM (
+            SELECT application_id,
+                   SUM((CASE term {case_arms} END) * tf * %s
+                       / (tf + %s * (1 - %s + %s * doc_length / %s))) AS score
+            FROM resume_terms
+            WHERE job_id = %s AND term IN ({term_placeholders})
+            GROUP BY application_id
+            ORDER BY score DESC
+            LIMIT %s
+        ) s
+        JOIN applications a ON a.id = s.application_id
+        ORDER BY s.score DESC
+    """, (*weight_params, BM25_K1 + 1, BM25_K1, BM25_B, BM25_B, avg_length,
+          job_id, *weights.keys(), limit))
+    results = [
+        {'application_id': application_id, 'name': name, 'email': email, 'status': status, 'score': float(score)}
+        for application_id, name, email, status, score in cursor.fetchall()
+    ]
+    cursor.close()
+    return results
+
+
+def rebuild_index(conn, batch_size=500):
+    """Re-indexes every application from scratch, committing once per batch."""
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM resume_terms")
+    cursor.execute("DELETE FROM resume_index_stats")
+    conn.commit()
+
+    last_id = 0
+    indexed = 0
+    while True:
+        cursor.execute("""
+            SELECT a.id, a.job_id, r.text_zlib FROM applications a
+            JOIN resumes r ON r.id = a.resume_id
+            WHERE a.id > %s AND a.parse_status = 'done'
+            ORDER BY a.id LIMIT %s
+        """, (last_id, batch_size))
+        batch = cursor.fetchall()
+        if not batch:
+            break
+        for application_id, job_id, text_zlib in batch:
+            index_application(conn, application_id, job_id, decompress_text(text_zlib))
+        conn.commit()
+        last_id = batch[-1][0]
+        indexed += len(batch)
+    cursor.close()
+    return indexed
+
+
+if __name__ == '__main__':
+    from db import get_pool
+
+    parser = argparse.ArgumentParser(description="Maintain the resume search index.")
+    parser.add_argument('--rebuild', action='store_true', help="re-index every existing application")
+    args = parser.parse_args()
+    if args.rebuild:
+        with get_pool().connection() as conn:
+            print(f"Indexed {rebuild_index(conn)} applications.")
+    else:
+        parser.print_help()
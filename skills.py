@@ -0,0 +1,222 @@
+"""Skill-match scoring between jobs and resumes.
+
+A job's free-text skills_required is normalised once, when the job is posted,
+into a set of skill IDs from the shared ``skills`` vocabulary. Each resume's
+skills are extracted once, when it is parsed. Both sets are stored packed as
+little-endian uint32 arrays, so a whole job's applicants can be re-scored in
+one NumPy pass without any per-applicant Python work.
+"""
+import argparse
+import re
+import threading
+
+import numpy as np
+
+from resume_store import decompress_text
+
+SKILL_ID_DTYPE = np.dtype('<u4')
+MAX_SKILL_WORDS = 4  # longest multi-word skill matched in resume text
+
+# Keeps skill spellings such as "c++", "c#" and "node.js" in one token.
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+SKILL_SEPARATORS_RE = re.compile(r"[,;\n|/]+")
+SKILL_ALIASES = {
+    'js': 'javascript',
+    'ts': 'typescript',
+    'golang': 'go',
+    'postgres': 'postgresql',
+    'k8s': 'kubernetes',
+    'ml': 'machine learning',
+    'amazon web services': 'aws',
+    'google cloud': 'gcp',
+    'nodejs': 'node.js',
+    'reactjs': 'react',
+    'react.js': 'react',
+}
+
+_vocabulary_lock = threading.Lock()
+_vocabulary = {'max_id': None, 'phrases': {}}
+
+
+def normalize_skill(raw):
+    """Canonical spelling of one skill, e.g. ' Postgres ' -> 'postgresql'."""
+    phrase = " ".join(token.rstrip(".") for token in TOKEN_RE.findall(raw.lower()))
+    return SKILL_ALIASES.get(phrase, phrase)
+
+
+def parse_skills_required(text):
+    """Splits a comma-separated skills list into unique, normalised skill names."""
+    names = (normalize_skill(part) for part in SKILL_SEPARATORS_RE.split(text or ""))
+    return list(dict.fromkeys(name for name in names if name and len(name) <= 100))
+
+
+def pack_skill_ids(skill_ids):
+    """Packs skill IDs into the compact sorted form stored in the database."""
+    return np.unique(np.asarray(list(skill_ids), dtype=SKILL_ID_DTYPE)).tobytes()
+
+
+def unpack_skill_ids(packed):
+    """Inverse of pack_skill_ids()."""
+    return np.frombuffer(packed or b"", dtype=SKILL_ID_DTYPE)
+
+
+def resolve_skill_ids(conn, names):
+    """Returns the IDs of ``names``, adding unknown skills to the vocabulary."""
+    if not names:
+        return []
+    cursor = conn.cursor()
+    cursor.executemany("INSERT IGNORE INTO skills (name) VALUES (%s)", [(name,) for name in names])
+    placeholders = ", ".join(["%s"] * len(names))
+    cursor.execute(f"SELECT id FROM skills WHERE name IN ({placeholders})", tuple(names))
+    skill_ids = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    return skill_ids
+
+
+def set_job_skills(conn, job_id, skills_required):
+    """Normalises a job's skills_required and stores its packed skill-ID set.
+
+    The caller commits.
+    """
+    packed = pack_skill_ids(resolve_skill_ids(conn, parse_skills_required(skills_required)))
+    cursor = conn.cursor()
+    cursor.execute("UPDATE jobs SET skill_ids = %s WHERE id = %s", (packed, job_id))
+    cursor.close()
+    return packed
+
+
+def extract_resume_skills(conn, resume_text):
+    """Returns the packed set of known skills mentioned in a resume."""
+    phrases = _load_vocabulary(conn)
+    tokens = [token.rstrip(".") for token in TOKEN_RE.findall((resume_text or "").lower())]
+    found = set()
+    for size in range(1, MAX_SKILL_WORDS + 1):
+        for start in range(len(tokens) - size + 1):
+            phrase = " ".join(tokens[start:start + size])
+            skill_id = phrases.get(SKILL_ALIASES.get(phrase, phrase))
+            if skill_id is not None:
+                found.add(skill_id)
+    return pack_skill_ids(found)
+
+
+def match_score(job_skills, resume_skills):
+    """Fraction of a job's required skills found in a resume (packed sets)."""
+    required = unpack_skill_ids(job_skills)
+    if not required.size:
+        return None
+    return float(np.isin(required, unpack_skill_ids(resume_skills), assume_unique=True).mean())
+
+
+def score_batch(job_skills, packed_resumes):
+    """Scores many resumes against one job in a single vectorised pass.
+
+    ``packed_resumes`` is a sequence of packed skill sets (None for resumes
+    not parsed yet). Returns a float array of scores in the same order.
+    """
+    required = unpack_skill_ids(job_skills)
+    if not required.size:
+        return np.full(len(packed_resumes), np.nan)
+    blobs = [packed or b"" for packed in packed_resumes]
+    lengths = np.fromiter((len(blob) for blob in blobs), dtype=np.int64, count=len(blobs)) // SKILL_ID_DTYPE.itemsize
+    skill_ids = np.frombuffer(b"".join(blobs), dtype=SKILL_ID_DTYPE)
+    owners = np.repeat(np.arange(len(blobs)), lengths)
+    is_required = np.isin(skill_ids, required, assume_unique=False)
+    matched = np.bincount(owners, weights=is_required, minlength=len(blobs))
+    return matched / required.size
+
+
+def rescore_job(conn, job_id, batch_size=5000):
+    """Recomputes skill_score for every parsed application of a job. Commits.
+
+    Returns the number of applications scored.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT skill_ids FROM jobs WHERE id = %s", (job_id,))
+    row = cursor.fetchone()
+    if not row:
+        cursor.close()
+        return 0
+    job_skills = row[0]
+    cursor.execute("""
+        SELECT id, skill_ids FROM applications
+        WHERE job_id = %s AND skill_ids IS NOT NULL
+    """, (job_id,))
+    applications = cursor.fetchall()
+    if applications:
+        scores = score_batch(job_skills, [packed for _, packed in applications])
+        updates = [(None if np.isnan(score) else float(score), application_id)
+                   for (application_id, _), score in zip(applications, scores)]
+        for start in range(0, len(updates), batch_size):
+            cursor.executemany("UPDATE applications SET skill_score = %s WHERE id = %s",
+                               updates[start:start + batch_size])
+    conn.commit()
+    cursor.close()
+    return len(applications)
+
+
+def _load_vocabulary(conn):
+    """The skills vocabulary as {name: id}, reloaded only when skills were added."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT MAX(id) FROM skills")
+    max_id = cursor.fetchone()[0]
+    with _vocabulary_lock:
+        if _vocabulary['max_id'] == max_id:
+            cursor.close()
+            return _vocabulary['phrases']
+    cursor.execute("SELECT name, id FROM skills")
+    phrases = dict(cursor.fetchall())
+    cursor.close()
+    with _vocabulary_lock:
+        _vocabulary.update(max_id=max_id, phrases=phrases)
+    return phrases
+
+
+def backfill(conn, batch_size=500):
+    """Fills in skill sets for jobs and applications stored before scoring existed."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, skills_required FROM jobs WHERE skill_ids IS NULL")
+    for job_id, skills_required in cursor.fetchall():
+        set_job_skills(conn, job_id, skills_required)
+    conn.commit()
+
+    # Each resume's skills are extracted once, however many applications use it.
+    last_id = 0
+    while True:
+        cursor.execute("""
+            SELECT r.id, r.text_zlib, r.skill_ids FROM resumes r
+            WHERE r.id > %s AND r.parse_status = 'done' AND EXISTS (
+                SELECT 1 FROM applications a WHERE a.resume_id = r.id AND a.skill_ids IS NULL
+            )
+            ORDER BY r.id LIMIT %s
+        """, (last_id, batch_size))
+        batch = cursor.fetchall()
+        if not batch:
+            break
+        resume_skills = [(packed if packed is not None else extract_resume_skills(conn, decompress_text(text_zlib)),
+                          resume_id) for resume_id, text_zlib, packed in batch]
+        cursor.executemany("UPDATE resumes SET skill_ids = %s WHERE id = %s", resume_skills)
+        cursor.executemany("UPDATE applications SET skill_ids = %s WHERE resume_id = %s AND skill_ids IS NULL",
+                           resume_skills)
+        conn.commit()
+        last_id = batch[-1][0]
+
+    cursor.execute("SELECT id FROM jobs")
+    job_ids = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    return sum(rescore_job(conn, job_id) for job_id in job_ids)
+
+
+if __name__ == '__main__':
+    from db import get_pool
+
+    parser = argparse.ArgumentParser(description="Maintain skill-match scores.")
+    parser.add_argument('--backfill', action='store_true', help="extract skills for existing jobs and resumes")
+    parser.add_argument('--rescore', type=int, metavar='JOB_ID', help="recompute the scores of one job")
+    args = parser.parse_args()
+    with get_pool().connection() as conn:
+        if args.backfill:
+            print(f"Scored {backfill(conn)} applications.")
+        elif args.rescore:
+            print(f"Scored {rescore_job(conn, args.rescore)} applications.")
+        else:
+            parser.print_help()
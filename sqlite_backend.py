@@ -0,0 +1,194 @@
+"""Embedded SQLite storage for local runs, tests and benchmarks.
+
+connect() returns a connection that behaves like the mysql.connector
+connections the rest of the app is written against: ``%s`` placeholders,
+``cursor(dictionary=True)``, ``in_transaction``, ``ping()`` and
+mysql.connector exception types. The few MySQL spellings the app uses and
+SQLite lacks (INSERT IGNORE, SELECT ... FOR UPDATE) are rewritten per
+statement; anything else that differs branches on db.dialect().
+
+The database runs in WAL mode so readers never block the single writer.
+Plain reads run outside any transaction; the first write, or a SELECT ...
+FOR UPDATE, starts an IMMEDIATE transaction, which takes the write lock up
+front instead of failing on a lock upgrade later.
+"""
+import re
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+
+from mysql.connector import errors
+
+DIALECT = 'sqlite'
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA cache_size = -65536",  # 64 MB page cache
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA mmap_size = 268435456",
+)
+
+_WRITE_RE = re.compile(r"^\s*(INSERT|UPDATE|DELETE|REPLACE|CREATE|ALTER|DROP)\b", re.I)
+_FOR_UPDATE_RE = re.compile(r"\s+FOR\s+UPDATE\s*$", re.I)
+_INSERT_IGNORE_RE = re.compile(r"^(\s*)INSERT\s+IGNORE\b", re.I)
+
+# Timestamps are stored as 'YYYY-MM-DD HH:MM:SS' text, the format of
+# CURRENT_TIMESTAMP, so they sort and compare correctly as strings.
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+sqlite3.register_converter("TIMESTAMP", lambda value: datetime.fromisoformat(value.decode()))
+
+
+@lru_cache(maxsize=1024)
+def translate(sql):
+    """Rewrites one statement for SQLite. Returns (sql, is_write)."""
+    is_write = bool(_WRITE_RE.match(sql))
+    if _FOR_UPDATE_RE.search(sql):
+        sql = _FOR_UPDATE_RE.sub("", sql)
+        is_write = True
+    sql = _INSERT_IGNORE_RE.sub(r"\1INSERT OR IGNORE", sql)
+    return sql.replace("%s", "?"), is_write
+
+
+def _translate_error(err):
+    """The mysql.connector exception matching a sqlite3 one."""
+    if isinstance(err, sqlite3.IntegrityError):
+        return errors.IntegrityError(msg=str(err))
+    if isinstance(err, sqlite3.OperationalError):
+        return errors.OperationalError(msg=str(err))
+    if isinstance(err, sqlite3.ProgrammingError):
+        return errors.ProgrammingError(msg=str(err))
+    return errors.DatabaseError(msg=str(err))
+
+
+@contextmanager
+def _translated_errors():
+    """Re-raises any sqlite3 error inside the block as its mysql.connector counterpart."""
+    try:
+        yield
+    except sqlite3.Error as err:
+        raise _translate_error(err) from err
+
+
+class SQLiteCursor:
+    """A sqlite3 cursor with the mysql.connector cursor interface the app uses."""
+
+    dialect = DIALECT
+
+    def __init__(self, connection, dictionary=False):
+        self._connection = connection
+        self._cursor = connection.raw.cursor()
+        self._dictionary = dictionary
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def with_rows(self):
+        return self._cursor.description is not None
+
+    def execute(self, operation, params=None):
+        sql, is_write = translate(operation)
+        with _translated_errors():
+            if is_write:
+                self._connection.begin_write()
+            self._cursor.execute(sql, tuple(params or ()))
+
+    def executemany(self, operation, seq_params):
+        sql, is_write = translate(operation)
+        with _translated_errors():
+            if is_write:
+                self._connection.begin_write()
+            self._cursor.executemany(sql, [tuple(params) for params in seq_params])
+
+    def fetchone(self):
+        with _translated_errors():
+            row = self._cursor.fetchone()
+        return self._as_dict(row) if self._dictionary and row is not None else row
+
+    def fetchmany(self, size=1):
+        with _translated_errors():
+            rows = self._cursor.fetchmany(size)
+        return [self._as_dict(row) for row in rows] if self._dictionary else rows
+
+    def fetchall(self):
+        with _translated_errors():
+            rows = self._cursor.fetchall()
+        return [self._as_dict(row) for row in rows] if self._dictionary else rows
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        with _translated_errors():
+            self._cursor.close()
+
+    def _as_dict(self, row):
+        return {column[0]: value for column, value in zip(self._cursor.description, row)}
+
+
+class SQLiteConnection:
+    """A sqlite3 connection with the mysql.connector connection interface the app uses."""
+
+    dialect = DIALECT
+    unread_result = False
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    @property
+    def in_transaction(self):
+        with _translated_errors():
+            return self.raw.in_transaction
+
+    def cursor(self, dictionary=False, buffered=None):
+        # sqlite3 always streams rows from the database file; ``buffered`` has no meaning here.
+        return SQLiteCursor(self, dictionary=dictionary)
+
+    def begin_write(self):
+        if not self.raw.in_transaction:
+            self.raw.execute("BEGIN IMMEDIATE")
+
+    def commit(self):
+        with _translated_errors():
+            self.raw.commit()
+
+    def rollback(self):
+        with _translated_errors():
+            self.raw.rollback()
+
+    def ping(self, reconnect=False, attempts=1, delay=0):
+        with _translated_errors():
+            self.raw.execute("SELECT 1")
+
+    def reconnect(self, attempts=1, delay=0):
+        # A local database file never drops the connection.
+        self.ping()
+
+    def consume_results(self):
+        pass
+
+    def close(self):
+        with _translated_errors():
+            self.raw.close()
+
+
+def connect(database, **_ignored):
+    """Opens (creating if needed) the SQLite database at ``database``."""
+    with _translated_errors():
+        raw = sqlite3.connect(database, isolation_level=None, check_same_thread=False,
+                              detect_types=sqlite3.PARSE_DECLTYPES)
+        for pragma in PRAGMAS:
+            raw.execute(pragma)
+    return SQLiteConnection(raw)
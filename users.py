@@ -0,0 +1,33 @@
+"""User accounts: registration and login lookups."""
+import hashlib
+
+
+def hash_password(password):
+    """Hashes a password using SHA-256."""
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def authenticate(conn, username, password, role):
+    """Returns {'id', 'role'} for matching credentials, or None."""
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("SELECT id, role FROM users WHERE username = %s AND password_hash = %s AND role = %s",
+                   (username, hash_password(password), role))
+    user = cursor.fetchone()
+    cursor.close()
+    return user
+
+
+def create_user(conn, username, password, role):
+    """Registers a user, then commits. Returns the new user's ID.
+
+    A taken username raises mysql.connector.IntegrityError.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("INSERT INTO users (username, password_hash, role) VALUES (%s, %s, %s)",
+                       (username, hash_password(password), role))
+        user_id = cursor.lastrowid
+        conn.commit()
+    finally:
+        cursor.close()
+    return user_id